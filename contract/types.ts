@@ -102,6 +102,12 @@ export interface UpsertVectorsResponse {
   upserted_count: number;
 }
 
+/** Batch variants (mock REST): arrays in, index-aligned arrays out. */
+export type SearchBatchRequest = SearchRequest[];
+export type SearchBatchResponse = SearchResponse[];
+export type UpsertVectorsBatchRequest = UpsertVectorsRequest[];
+export type UpsertVectorsBatchResponse = UpsertVectorsResponse[];
+
 // ---------------------------------------------------------------------------
 // 5. Execute Action (Skills)
 // ---------------------------------------------------------------------------
@@ -253,6 +259,14 @@ export type AgentEvent =
   | ErrorEvent
   | SessionEndedEvent;
 
+/** One WebSocket text frame: a single event, or an array when the handshake set `batch: true`. */
+export type AgentEventFrame = AgentEvent | AgentEvent[];
+
+/** Flatten a frame into its events (in emission order). */
+export function agentEventsOf(frame: AgentEventFrame): AgentEvent[] {
+  return Array.isArray(frame) ? frame : [frame];
+}
+
 const AGENT_EVENT_KINDS: readonly AgentEventKind[] = [
   "session_started", "thought", "action_planned", "action_started", "action_completed",
   "memory_read", "memory_written", "search_issued", "search_result", "converged",
@@ -15,7 +15,7 @@ use proto::pagi_proto::{
 use safety_governor::SafetyGovernor;
 use std::path::PathBuf;
 use std::sync::Arc;
-use tonic::{Request, Response, Status};
+use tonic::{Request, Response, Status, Streaming};
 use watchdog::Watchdog;
 
 struct Orchestrator {
@@ -152,6 +152,23 @@ impl Pagi for Orchestrator {
             .map(Response::new)
     }
 
+    async fn upsert_vectors_stream(
+        &self,
+        request: Request<Streaming<UpsertRequest>>,
+    ) -> Result<Response<UpsertResponse>, Status> {
+        // Upsert each batch as it arrives; the bridge embeds the next batch while this one is in flight.
+        let mut stream = request.into_inner();
+        let mut upserted_count: u32 = 0;
+        while let Some(batch) = stream.message().await? {
+            let resp = self.memory.upsert_vectors(batch).await?;
+            upserted_count += resp.upserted_count;
+        }
+        Ok(Response::new(UpsertResponse {
+            success: true,
+            upserted_count,
+        }))
+    }
+
     async fn simulate_error(
         &self,
         _request: Request<Empty>,
@@ -13,9 +13,51 @@ use qdrant_client::qdrant::{
 use tonic::Status;
 
 use crate::proto::pagi_proto::{
-    SearchHit, SearchRequest, SearchResponse, UpsertRequest, UpsertResponse,
+    SearchHit, SearchRequest, SearchResponse, UpsertRequest, UpsertResponse, VectorPoint,
 };
 
+/// IEEE 754 half (binary16) bits -> f32. Bridge sends little-endian halves when PAGI_EMBED_DTYPE=float16.
+fn f16_to_f32(h: u16) -> f32 {
+    let sign = ((h >> 15) as u32) << 31;
+    let exp = ((h >> 10) & 0x1f) as u32;
+    let mant = (h & 0x3ff) as u32;
+    match exp {
+        0 => {
+            // Zero / subnormal: mant * 2^-24.
+            let v = mant as f32 * (1.0 / 16_777_216.0);
+            if sign != 0 {
+                -v
+            } else {
+                v
+            }
+        }
+        0x1f => f32::from_bits(sign | 0x7f80_0000 | (mant << 13)),
+        _ => f32::from_bits(sign | ((exp + 112) << 23) | (mant << 13)),
+    }
+}
+
+/// Resolve a point's f32 vector from whichever wire encoding the bridge used (f32, f16, or int8 + scale).
+fn decode_point_vector(p: &VectorPoint) -> Result<Vec<f32>, Status> {
+    if !p.vector_f16.is_empty() {
+        if p.vector_f16.len() % 2 != 0 {
+            return Err(Status::invalid_argument(format!(
+                "vector_f16 for point {} has odd byte length",
+                p.id
+            )));
+        }
+        return Ok(p
+            .vector_f16
+            .chunks_exact(2)
+            .map(|b| f16_to_f32(u16::from_le_bytes([b[0], b[1]])))
+            .collect());
+    }
+    if !p.vector_i8.is_empty() {
+        let scale = p.vector_scale;
+        return Ok(p.vector_i8.iter().map(|&q| (q as i8) as f32 * scale).collect());
+    }
+    Ok(p.vector.clone())
+}
+
 /// Tiered memory manager; layers 1–7 per blueprint.
 pub struct MemoryManager {
     /// L1 sensory: ring-buffer stub (key -> raw bytes).
@@ -228,12 +270,17 @@ impl MemoryManager {
             .ok_or_else(|| Status::failed_precondition("Qdrant disabled (PAGI_DISABLE_QDRANT=true)"))?;
 
         let mut points: Vec<PointStruct> = Vec::with_capacity(req.points.len());
-        for p in req.points {
+        for mut p in req.points {
+            let vector = if p.vector_f16.is_empty() && p.vector_i8.is_empty() {
+                std::mem::take(&mut p.vector)
+            } else {
+                decode_point_vector(&p)?
+            };
             let mut payload = Payload::new();
             for (k, v) in p.payload {
                 payload.insert(k, v);
             }
-            points.push(PointStruct::new(PointId::from(p.id), p.vector, payload));
+            points.push(PointStruct::new(PointId::from(p.id), vector, payload));
         }
         let n = points.len();
         l4
@@ -246,3 +293,40 @@ impl MemoryManager {
         })
     }
 }
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    #[test]
+    fn test_f16_to_f32_roundtrip_values() {
+        assert_eq!(f16_to_f32(0x0000), 0.0);
+        assert_eq!(f16_to_f32(0x3c00), 1.0);
+        assert_eq!(f16_to_f32(0xc000), -2.0);
+        assert_eq!(f16_to_f32(0x3800), 0.5);
+        assert_eq!(f16_to_f32(0x0001), 1.0 / 16_777_216.0);
+        assert!(f16_to_f32(0x7c00).is_infinite());
+    }
+
+    #[test]
+    fn test_decode_point_vector_encodings() {
+        let mut p = VectorPoint {
+            id: "p".to_string(),
+            vector: vec![0.25, -1.0],
+            ..Default::default()
+        };
+        assert_eq!(decode_point_vector(&p).unwrap(), vec![0.25, -1.0]);
+
+        p.vector_f16 = vec![0x00, 0x3c, 0x00, 0xc0];
+        assert_eq!(decode_point_vector(&p).unwrap(), vec![1.0, -2.0]);
+
+        p.vector_f16.clear();
+        p.vector_i8 = vec![127u8, 0x81]; // 127, -127
+        p.vector_scale = 0.5;
+        assert_eq!(decode_point_vector(&p).unwrap(), vec![63.5, -63.5]);
+
+        p.vector_i8.clear();
+        p.vector_f16 = vec![0x00];
+        assert!(decode_point_vector(&p).is_err());
+    }
+}
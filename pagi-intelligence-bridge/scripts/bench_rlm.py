@@ -7,6 +7,7 @@ Runs a handful of representative loop paths:
 - structured stub JSON parsing (no action)
 - structured stub JSON + local dispatch action (peek_file)
 - mock mode (no outbound)
+- _parse_structured_response alone (bare and fenced JSON), the per-step cost of real LLM output
 
 Usage:
   python scripts/bench_rlm.py
@@ -18,7 +19,9 @@ import os
 import sys
 import tempfile
 import time
+from contextlib import contextmanager
 from pathlib import Path
+from typing import Iterator
 
 
 # Ensure `src/` is importable when running from `scripts/`.
@@ -26,24 +29,65 @@ _BRIDGE_ROOT = Path(__file__).resolve().parents[1]
 if str(_BRIDGE_ROOT) not in sys.path:
     sys.path.insert(0, str(_BRIDGE_ROOT))
 
-
-def _run_case(name: str, env: dict[str, str], iters: int) -> None:
-    from src.recursive_loop import RLMQuery, recursive_loop
-
-    old = dict(os.environ)
+import src.recursive_loop as rl  # noqa: E402
+from src.recursive_loop import (  # noqa: E402
+    RLMQuery,
+    RLMStructuredResponse,
+    _clear_config,
+    _parse_structured_response,
+    _reload_config,
+    recursive_loop,
+)
+
+
+@contextmanager
+def _scoped_env(env: dict[str, str]) -> Iterator[None]:
+    """Apply env for the duration of a case; restore only the keys it touched."""
+    saved = {k: os.environ.get(k) for k in env}
+    os.environ.update(env)
     try:
-        os.environ.update(env)
-        t0 = time.perf_counter()
-        converged = 0
-        for _ in range(iters):
-            out = recursive_loop(RLMQuery(query="bench", context="resolved", depth=0))
-            converged += 1 if out.converged else 0
-        dt = time.perf_counter() - t0
-        rps = iters / dt if dt > 0 else float("inf")
-        print(f"{name:35s}  {rps:10.1f} it/s  converged={converged}/{iters}")
+        yield
     finally:
-        os.environ.clear()
-        os.environ.update(old)
+        for k, v in saved.items():
+            if v is None:
+                os.environ.pop(k, None)
+            else:
+                os.environ[k] = v
+
+
+def _run_case(
+    name: str,
+    env: dict[str, str],
+    iters: int,
+    stub_model: RLMStructuredResponse | None = None,
+) -> None:
+    with _scoped_env(env):
+        # Read env once per case; iterations use the pinned snapshot.
+        _reload_config()
+        # A pre-validated stub keeps JSON parsing out of the measured loop.
+        rl._STUB_MODEL_OVERRIDE = stub_model
+        try:
+            t0 = time.perf_counter_ns()
+            converged = 0
+            for _ in range(iters):
+                out = recursive_loop(RLMQuery(query="bench", context="resolved", depth=0))
+                converged += 1 if out.converged else 0
+            dt_ns = time.perf_counter_ns() - t0
+            rps = iters * 1_000_000_000 / dt_ns if dt_ns > 0 else float("inf")
+            print(f"{name:35s}  {rps:10.1f} it/s  converged={converged}/{iters}")
+        finally:
+            rl._STUB_MODEL_OVERRIDE = None
+            _clear_config()
+
+
+def _run_parse_case(name: str, raw: str, iters: int) -> None:
+    t0 = time.perf_counter_ns()
+    for _ in range(iters):
+        _parse_structured_response(raw)
+    dt_ns = time.perf_counter_ns() - t0
+    rps = iters * 1_000_000_000 / dt_ns if dt_ns > 0 else float("inf")
+    decoder = "orjson" if rl.orjson is not None else "pydantic"
+    print(f"{name:35s}  {rps:10.1f} it/s  decoder={decoder}")
 
 
 def main() -> None:
@@ -69,18 +113,18 @@ def main() -> None:
         f.write("hello world")
         tmp_path = f.name
 
+    peek_stub = (
+        '{'
+        '"thought":"peek",'
+        '"action":{"skill_name":"peek_file","params":{"path":"%s","start":0,"end":5}},'
+        '"is_final":false'
+        '}'
+    ) % tmp_path.replace("\\", "\\\\")
+
     _run_case(
         "structured_stub_local_dispatch_peek",
         {
             "PAGI_MOCK_MODE": "false",
-            "PAGI_RLM_STUB_JSON": (
-                '{'
-                '"thought":"peek",'
-                '"action":{"skill_name":"peek_file","params":{"path":"%s","start":0,"end":5}},'
-                '"is_final":false'
-                '}'
-            )
-            % tmp_path.replace("\\", "\\\\"),
             "PAGI_ENFORCE_STRUCTURED": "true",
             "PAGI_ALLOW_OUTBOUND": "false",
             "PAGI_ALLOW_LOCAL_DISPATCH": "true",
@@ -88,6 +132,7 @@ def main() -> None:
             "PAGI_VERBOSE_ACTIONS": "false",
         },
         iters,
+        stub_model=RLMStructuredResponse.model_validate_json(peek_stub),
     )
 
     # Case 3: Mock mode
@@ -105,6 +150,10 @@ def main() -> None:
         iters,
     )
 
+    # Case 4: Uncached structured parse (what each outbound LLM step pays)
+    _run_parse_case("parse_structured_bare", peek_stub, iters)
+    _run_parse_case("parse_structured_fenced", f"```json\n{peek_stub}\n```", iters)
+
 
 if __name__ == "__main__":
     main()
@@ -5,8 +5,28 @@ Run from repo root: poetry run python scripts/peek_proto.py
 Or from pagi-intelligence-bridge: poetry run python scripts/peek_proto.py
 """
 
+import ast
+import importlib.util
+import re
+import subprocess
+import sys
 from pathlib import Path
 
+_MESSAGE_RE = re.compile(r"^message\s+(\w+)", re.MULTILINE)
+
+
+def _top_level_names(tree: ast.Module) -> tuple[list[str], list[str]]:
+    """Public top-level (classes, assigned names) of a module, without executing it."""
+    classes = [n.name for n in tree.body if isinstance(n, ast.ClassDef)]
+    assigned = [
+        t.id
+        for n in tree.body
+        if isinstance(n, ast.Assign)
+        for t in n.targets
+        if isinstance(t, ast.Name) and not t.id.startswith("_")
+    ]
+    return classes, assigned
+
 
 def main() -> None:
     repo_root = Path(__file__).resolve().parent.parent.parent
@@ -17,26 +37,26 @@ def main() -> None:
     if not proto_file.exists():
         raise FileNotFoundError(f"Proto not found: {proto_file}")
 
-    # Compile with grpcio_tools (must be installed: poetry add --group dev grpcio-tools)
-    try:
-        import grpc_tools.protoc as protoc
-    except ImportError:
+    # Compile with grpcio_tools (must be installed: poetry add --group dev grpcio-tools).
+    # Run it out of process so this script never loads the protobuf runtime itself.
+    if importlib.util.find_spec("grpc_tools") is None:
         print("Install grpcio-tools: poetry add --group dev grpcio-tools")
-        raise
+        raise ImportError("grpc_tools is not installed")
 
     out_dir.mkdir(parents=True, exist_ok=True)
 
-    # grpc_tools.protoc expects argv-style params (argv[0] is program name).
     # IMPORTANT: pass the .proto path relative to the provided -I/--proto_path to avoid
     # "File does not reside within any path specified using --proto_path" on Windows.
     args = [
-        "protoc",
+        sys.executable,
+        "-m",
+        "grpc_tools.protoc",
         f"-I{proto_dir}",
         f"--python_out={out_dir}",
         f"--grpc_python_out={out_dir}",
         proto_file.name,
     ]
-    code = protoc.main(args)
+    code = subprocess.run(args, check=False).returncode
     if code != 0:
         raise RuntimeError(f"protoc failed with exit code {code}")
 
@@ -50,14 +70,16 @@ def main() -> None:
     print(f"  Generated: {pb2_file}")
     print(f"  Generated: {pb2_grpc_file}")
 
-    # Import and list message/descriptor names
-    import importlib.util
-    spec = importlib.util.spec_from_file_location("pagi_pb2", pb2_file)
-    mod = importlib.util.module_from_spec(spec)
-    spec.loader.exec_module(mod)
+    # Static peek: importing pagi_pb2 would register the whole descriptor pool just to list names.
+    # Message classes are injected at runtime by _builder, so their names come from the .proto itself.
+    _, pb2_names = _top_level_names(ast.parse(pb2_file.read_text(encoding="utf-8")))
+    if "DESCRIPTOR" not in pb2_names:
+        raise RuntimeError("pagi_pb2.py has no DESCRIPTOR; check grpc_tools output.")
+    grpc_classes, _ = _top_level_names(ast.parse(pb2_grpc_file.read_text(encoding="utf-8")))
 
-    messages = [name for name in dir(mod) if not name.startswith("_")]
+    messages = sorted(_MESSAGE_RE.findall(proto_file.read_text(encoding="utf-8")))
     print("  Messages:", ", ".join(messages))
+    print("  Services:", ", ".join(grpc_classes))
 
 
 if __name__ == "__main__":
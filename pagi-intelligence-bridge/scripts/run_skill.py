@@ -5,7 +5,6 @@ Run from bridge root (current_dir). Adds src to path and invokes skills.<skill>.
 
 from __future__ import annotations
 
-import json
 import sys
 from pathlib import Path
 
@@ -24,6 +23,21 @@ def _params_class_name(skill_name: str) -> str:
     return "".join(w.capitalize() for w in skill_name.split("_")) + "Params"
 
 
+def _resolve_params_cls(mod, skill_name: str) -> type | None:
+    params_cls = getattr(mod, _params_class_name(skill_name), None)
+    if params_cls is not None:
+        return params_cls
+    # Non-conventional name: first *Params class defined in the skill module itself.
+    return next(
+        (
+            obj
+            for name, obj in vars(mod).items()
+            if isinstance(obj, type) and name.endswith("Params") and obj.__module__ == mod.__name__
+        ),
+        None,
+    )
+
+
 def main() -> None:
     if len(sys.argv) < 3:
         print("[run_skill] usage: python run_skill.py <skill_name> <json_params>", file=sys.stderr)
@@ -37,27 +51,12 @@ def main() -> None:
         if run_fn is None:
             print("[run_skill] Skill missing run()", file=sys.stderr)
             sys.exit(1)
-        params_cls = getattr(mod, _params_class_name(skill_name), None)
-        if params_cls is None:
-            for cand in (
-                "PeekFileParams",
-                "SaveSkillParams",
-                "ExecuteSkillParams",
-                "ListDirParams",
-                "ReadEntireFileSafeParams",
-                "WriteFileSafeParams",
-                "ListFilesRecursiveParams",
-                "AnalyzeCodeParams",
-                "EvolveSkillFromPatchParams",
-                "GenerateNewSkillParams",
-            ):
-                if hasattr(mod, cand):
-                    params_cls = getattr(mod, cand)
-                    break
+        params_cls = _resolve_params_cls(mod, skill_name)
         if params_cls is None:
             print("[run_skill] Params model not found", file=sys.stderr)
             sys.exit(1)
-        params = params_cls.model_validate(json.loads(params_json))
+        # Fused JSON parse + validation in pydantic-core; no intermediate dict.
+        params = params_cls.model_validate_json(params_json)
         result = run_fn(params)
         print(result)
     except Exception as e:
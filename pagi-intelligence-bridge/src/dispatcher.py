@@ -0,0 +1,110 @@
+"""Bounded async dispatcher for concurrent RLM requests (opt-in via PAGI_PIPELINE_WORKERS).
+
+Requests are admitted through a bounded asyncio.Queue and drained by a fixed set of worker tasks,
+each running the blocking recursive_loop in a thread. Compared with handing every request straight
+to the shared threadpool, this caps in-flight loops (back-pressure instead of unbounded fan-out)
+and keeps cheap counters for utilization instead of per-request prints.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+from dataclasses import asdict, dataclass
+from typing import Callable, Optional
+
+from .recursive_loop import RLMQuery, RLMSummary, recursive_loop
+
+
+def _pipeline_workers() -> int:
+    return max(0, int(os.environ.get("PAGI_PIPELINE_WORKERS", "0")))
+
+
+def _pipeline_qsize() -> int:
+    return max(1, int(os.environ.get("PAGI_PIPELINE_QSIZE", "64")))
+
+
+@dataclass
+class DispatcherStats:
+    submitted: int = 0
+    completed: int = 0
+    failed: int = 0
+    busy: int = 0
+    max_busy: int = 0
+    busy_ns: int = 0
+
+
+class Dispatcher:
+    """N workers draining one bounded queue of (query, future); submit() awaits the loop's result."""
+
+    def __init__(
+        self,
+        workers: int,
+        qsize: int = 64,
+        run: Callable[[RLMQuery], RLMSummary] = recursive_loop,
+    ) -> None:
+        self.workers = max(1, workers)
+        self._queue: asyncio.Queue[tuple[RLMQuery, asyncio.Future[RLMSummary]]] = asyncio.Queue(maxsize=qsize)
+        self._run = run
+        self._tasks: list[asyncio.Task[None]] = []
+        self.stats = DispatcherStats()
+
+    def start(self) -> None:
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        for t in self._tasks:
+            t.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        while not self._queue.empty():
+            _, fut = self._queue.get_nowait()
+            fut.cancel()
+
+    async def submit(self, query: RLMQuery) -> RLMSummary:
+        fut: asyncio.Future[RLMSummary] = asyncio.get_running_loop().create_future()
+        # Blocks (awaits) while the queue is full: admission control for the whole server.
+        await self._queue.put((query, fut))
+        self.stats.submitted += 1
+        return await fut
+
+    def snapshot(self) -> dict:
+        out = asdict(self.stats)
+        out["queued"] = self._queue.qsize()
+        out["workers"] = self.workers
+        return out
+
+    async def _worker(self) -> None:
+        stats = self.stats
+        while True:
+            query, fut = await self._queue.get()
+            stats.busy += 1
+            stats.max_busy = max(stats.max_busy, stats.busy)
+            t0 = time.perf_counter_ns()
+            try:
+                result = await asyncio.to_thread(self._run, query)
+            except asyncio.CancelledError:
+                fut.cancel()
+                raise
+            except Exception as e:
+                stats.failed += 1
+                if not fut.done():
+                    fut.set_exception(e)
+            else:
+                stats.completed += 1
+                if not fut.done():
+                    fut.set_result(result)
+            finally:
+                stats.busy -= 1
+                stats.busy_ns += time.perf_counter_ns() - t0
+                self._queue.task_done()
+
+
+def dispatcher_from_env() -> Optional[Dispatcher]:
+    """Dispatcher sized by PAGI_PIPELINE_WORKERS / PAGI_PIPELINE_QSIZE, or None when disabled (0)."""
+    workers = _pipeline_workers()
+    if workers <= 0:
+        return None
+    return Dispatcher(workers, qsize=_pipeline_qsize())
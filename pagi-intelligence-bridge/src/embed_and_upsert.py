@@ -10,6 +10,8 @@ Usage:
 """
 
 import argparse
+import atexit
+import functools
 import os
 import sys
 from pathlib import Path
@@ -27,19 +29,121 @@ def _embedding_dim() -> int:
     return int(os.environ.get("PAGI_EMBEDDING_DIM", "1536"))
 
 
+def _embed_dtype() -> str:
+    """Wire encoding for upserted vectors: float32 (default), float16, or int8 (per-vector scale)."""
+    return (os.environ.get("PAGI_EMBED_DTYPE") or "float32").strip().lower()
+
+
+@functools.lru_cache(maxsize=4)
+def _get_model(model_name: str):
+    """Load a SentenceTransformer once per process per model name (weights load is the dominant cost)."""
+    from sentence_transformers import SentenceTransformer
+
+    return SentenceTransformer(model_name)
+
+
 def _grpc_addr() -> str:
     port = os.environ.get("PAGI_GRPC_PORT", "50051")
     return f"[::1]:{port}"
 
 
-def embed_text(text: str, model) -> list[float]:
-    vec = model.encode(text).tolist()
+_GRPC_CHANNEL_OPTIONS = [
+    ("grpc.max_send_message_length", 64 << 20),
+    ("grpc.keepalive_time_ms", 30000),
+]
+
+_grpc_channel = None
+_grpc_stub = None
+_grpc_channel_addr: str | None = None
+
+
+def _get_stub(grpc_addr: str):
+    """Lazy singleton channel + stub shared by search_kb / upsert_to_kb (one HTTP/2 handshake per process)."""
+    import grpc
+
+    global _grpc_channel, _grpc_stub, _grpc_channel_addr
+    if _grpc_stub is not None and _grpc_channel_addr == grpc_addr:
+        return _grpc_stub
+    if _grpc_channel is not None:
+        _grpc_channel.close()
+    _grpc_channel = grpc.insecure_channel(grpc_addr, options=_GRPC_CHANNEL_OPTIONS)
+    _grpc_stub = pagi_pb2_grpc.PagiStub(_grpc_channel)
+    _grpc_channel_addr = grpc_addr
+    return _grpc_stub
+
+
+_heal_log_fh = None
+_heal_log_path: str | None = None
+
+
+def _heal_log(msg: str) -> None:
+    """Append one line to PAGI_SELF_HEAL_LOG; the handle stays open (line-buffered) for the process."""
+    global _heal_log_fh, _heal_log_path
+    path = os.environ.get("PAGI_SELF_HEAL_LOG")
+    if not path:
+        return
+    if _heal_log_fh is None or _heal_log_path != path:
+        if _heal_log_fh is not None:
+            _heal_log_fh.close()
+        # "a" opens with O_APPEND, so each line lands at EOF even with concurrent writers.
+        _heal_log_fh = open(path, "a", buffering=1, encoding="utf-8")
+        _heal_log_path = path
+    _heal_log_fh.write(msg + "\n")
+
+
+@atexit.register
+def _close_heal_log() -> None:
+    if _heal_log_fh is not None:
+        _heal_log_fh.close()
+
+
+def embed_texts(texts: list[str], model, batch_size: int = 64):
+    """Encode all texts in one batched model.encode call; rows padded/truncated to PAGI_EMBEDDING_DIM.
+
+    Returns a float32 ndarray of shape (len(texts), dim); convert rows to lists only at the proto boundary.
+    """
+    import numpy as np
+
     dim = _embedding_dim()
-    if len(vec) < dim:
-        vec = vec + [0.0] * (dim - len(vec))
-    elif len(vec) > dim:
-        vec = vec[:dim]
-    return vec
+    if not texts:
+        return np.zeros((0, dim), dtype=np.float32)
+    vecs = model.encode(texts, batch_size=batch_size, convert_to_numpy=True, show_progress_bar=False)
+    vecs = np.asarray(vecs, dtype=np.float32).reshape(len(texts), -1)
+    width = vecs.shape[1]
+    if width < dim:
+        vecs = np.pad(vecs, ((0, 0), (0, dim - width)))
+    elif width > dim:
+        vecs = vecs[:, :dim]
+    return vecs
+
+
+def embed_text(text: str, model) -> list[float]:
+    return embed_texts([text], model)[0].tolist()
+
+
+def encode_vectors(vectors, dtype: str | None = None) -> list[dict]:
+    """Per-row VectorPoint vector fields for the requested wire dtype (Rust decodes to f32 before upsert).
+
+    float16 halves wire bytes; int8 quarters them with a per-vector max-abs scale.
+    """
+    import numpy as np
+
+    dtype = dtype or _embed_dtype()
+    if dtype in ("float16", "fp16", "f16"):
+        halves = np.ascontiguousarray(vectors, dtype="<f2")
+        return [{"vector_f16": row.tobytes()} for row in halves]
+    if dtype in ("int8", "q8", "i8"):
+        vecs = np.asarray(vectors, dtype=np.float32)
+        scales = np.abs(vecs).max(axis=1, initial=0.0) / 127.0
+        scales[scales == 0.0] = 1.0
+        quant = np.clip(np.rint(vecs / scales[:, None]), -127, 127).astype(np.int8)
+        return [
+            {"vector_i8": row.tobytes(), "vector_scale": float(scale)}
+            for row, scale in zip(quant, scales)
+        ]
+    if dtype not in ("float32", "fp32", "f32"):
+        raise ValueError(f"Unsupported PAGI_EMBED_DTYPE: {dtype!r} (use float32, float16 or int8)")
+    return [{"vector": row.tolist()} for row in vectors]
 
 
 def search_kb(
@@ -50,16 +154,12 @@ def search_kb(
     model_name: str | None = None,
 ):
     """Embed query, call SemanticSearch with query_vector, return hits (for L4 demo)."""
-    import grpc
-    from sentence_transformers import SentenceTransformer
-
     grpc_addr = grpc_addr or _grpc_addr()
     model_name = model_name or os.environ.get("PAGI_EMBED_MODEL", "all-MiniLM-L6-v2")
-    model = SentenceTransformer(model_name)
+    model = _get_model(model_name)
     vector = embed_text(query, model)
 
-    channel = grpc.insecure_channel(grpc_addr)
-    stub = pagi_pb2_grpc.PagiStub(channel)
+    stub = _get_stub(grpc_addr)
     req = pagi_pb2.SearchRequest(
         query=query,
         kb_name=kb_name,
@@ -74,11 +174,56 @@ def chunk_doc(file_path: str | Path, chunk_size: int = 1000) -> list[str]:
     path = Path(file_path)
     if not path.exists():
         raise FileNotFoundError(f"Doc not found: {path}")
-    text = path.read_text(encoding="utf-8", errors="replace")
-    return [
-        text[i : i + chunk_size]
-        for i in range(0, len(text), chunk_size)
-    ]
+    # Stream fixed-size character chunks straight from the decoder instead of materializing the
+    # whole document and then slicing copies out of it (same chunks, ~half the peak memory).
+    chunks: list[str] = []
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        while chunk := f.read(chunk_size):
+            chunks.append(chunk)
+    return chunks
+
+
+def _build_points(chunks: list[str], vectors, doc_basename: str, start: int = 0) -> list:
+    points = []
+    for idx, (chunk, vector_fields) in enumerate(zip(chunks, encode_vectors(vectors)), start=start):
+        snippet = (chunk[:500] + "…") if len(chunk) > 500 else chunk
+        point = pagi_pb2.VectorPoint(
+            id=f"{doc_basename}_chunk_{idx}",
+            payload={"content": snippet},
+            **vector_fields,
+        )
+        points.append(point)
+    return points
+
+
+def _iter_upsert_batches(kb_name: str, chunks: list[str], doc_basename: str, model, batch_size: int):
+    """Yield one UpsertRequest per embedded batch; gRPC sends batch K-1 while batch K is encoded."""
+    for start in range(0, len(chunks), batch_size):
+        batch = chunks[start : start + batch_size]
+        vectors = embed_texts(batch, model, batch_size=batch_size)
+        yield pagi_pb2.UpsertRequest(kb_name=kb_name, points=_build_points(batch, vectors, doc_basename, start))
+
+
+def _upsert_stream(stub, requests):
+    """UpsertVectorsStream over `requests`; an exception raised while producing them is re-raised as-is.
+
+    gRPC would otherwise report it only as an opaque RpcError (UNKNOWN, "Exception iterating requests!").
+    """
+    failure: list[BaseException] = []
+
+    def guarded():
+        try:
+            yield from requests
+        except BaseException as e:
+            failure.append(e)
+            raise
+
+    try:
+        return stub.UpsertVectorsStream(guarded())
+    except Exception as e:
+        if failure:
+            raise failure[0] from e
+        raise
 
 
 def upsert_to_kb(
@@ -87,31 +232,31 @@ def upsert_to_kb(
     grpc_addr: str | None = None,
     chunk_size: int = 1000,
     model_name: str | None = None,
+    batch_size: int = 64,
+    stream: bool = False,
 ):
+    """Embed and upsert a doc. stream=True sends one UpsertVectorsStream message per embedded batch,
+    falling back to unary UpsertVectors when the orchestrator doesn't implement the streaming RPC.
+    """
     import grpc
-    from sentence_transformers import SentenceTransformer
 
     grpc_addr = grpc_addr or _grpc_addr()
     model_name = model_name or os.environ.get("PAGI_EMBED_MODEL", "all-MiniLM-L6-v2")
-    model = SentenceTransformer(model_name)
+    model = _get_model(model_name)
 
-    channel = grpc.insecure_channel(grpc_addr)
-    stub = pagi_pb2_grpc.PagiStub(channel)
+    stub = _get_stub(grpc_addr)
     chunks = chunk_doc(doc_path, chunk_size=chunk_size)
     doc_basename = Path(doc_path).name
 
-    points = []
-    for idx, chunk in enumerate(chunks):
-        vector = embed_text(chunk, model)
-        snippet = (chunk[:500] + "…") if len(chunk) > 500 else chunk
-        point = pagi_pb2.VectorPoint(
-            id=f"{doc_basename}_chunk_{idx}",
-            vector=vector,
-            payload={"content": snippet},
-        )
-        points.append(point)
+    if stream:
+        try:
+            return _upsert_stream(stub, _iter_upsert_batches(kb_name, chunks, doc_basename, model, batch_size))
+        except grpc.RpcError as e:
+            if e.code() != grpc.StatusCode.UNIMPLEMENTED:
+                raise
 
-    req = pagi_pb2.UpsertRequest(kb_name=kb_name, points=points)
+    vectors = embed_texts(chunks, model, batch_size=batch_size)
+    req = pagi_pb2.UpsertRequest(kb_name=kb_name, points=_build_points(chunks, vectors, doc_basename))
     response = stub.UpsertVectors(req)
     return response
 
@@ -126,6 +271,12 @@ def main() -> None:
     parser.add_argument("--limit", type=int, default=5, help="Max search results (with --search)")
     parser.add_argument("--grpc", default=None, help="gRPC address (default [::1]:PAGI_GRPC_PORT)")
     parser.add_argument("--chunk-size", type=int, default=1000, help="Chars per chunk (indexing only)")
+    parser.add_argument("--batch-size", type=int, default=64, help="Chunks per model.encode batch (indexing only)")
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Stream one UpsertVectorsStream message per embedded batch (falls back to unary if unimplemented)",
+    )
     args = parser.parse_args()
 
     if args.search:
@@ -152,13 +303,13 @@ def main() -> None:
             args.doc,
             grpc_addr=args.grpc,
             chunk_size=args.chunk_size,
+            batch_size=args.batch_size,
+            stream=args.stream,
         )
         print(f"Upserted {resp.upserted_count} points to {args.kb} (success={resp.success})")
         # L6 traceability: log KB bootstrap when audit log is configured
-        log_path = os.environ.get("PAGI_SELF_HEAL_LOG")
-        if log_path and resp.success:
-            with open(log_path, "a", encoding="utf-8") as f:
-                f.write(f"L6 KB bootstrap: indexed {args.doc} -> {args.kb} ({resp.upserted_count} points)\n")
+        if resp.success:
+            _heal_log(f"L6 KB bootstrap: indexed {args.doc} -> {args.kb} ({resp.upserted_count} points)")
     except grpc.RpcError as e:
         print(f"gRPC error: {e.code()} {e.details()}", file=sys.stderr)
         sys.exit(1)
@@ -1,17 +1,37 @@
 """FastAPI entrypoint for pagi-intelligence-bridge (sidecar to Rust orchestrator)."""
 
+import json
 import os
 import traceback
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional, TypeVar
 
 from dotenv import load_dotenv
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.exceptions import RequestValidationError
+from pydantic import BaseModel, TypeAdapter, ValidationError
+from fastapi.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
+
+try:
+    import orjson  # noqa: F401  (ORJSONResponse needs it at render time)
+    from fastapi.responses import ORJSONResponse as _DefaultResponse
+except ImportError:
+    _DefaultResponse = JSONResponse
 
 load_dotenv()  # Load .env from cwd if present (reproducible L5 verification)
 
+from .dispatcher import Dispatcher, dispatcher_from_env
+from .skills.execute_skill import skill_index
 from .recursive_loop import (
     MAX_RECURSION_DEPTH,
     RLMQuery,
     RLMSummary,
+    _clear_config,
+    _current_config,
+    _preload_local_skills,
+    _prewarm_grpc_channel,
+    _reload_config,
     _report_self_heal,
     recursive_loop,
 )
@@ -23,7 +43,100 @@ class RLMMultiTurnRequest(RLMQuery):
     max_turns: int = 5
 
 
-app = FastAPI(title="pagi-intelligence-bridge", version="0.1.0")
+class RLMBatchRequest(BaseModel):
+    """Independent RLM queries for /rlm-batch, run in order under one config snapshot."""
+
+    requests: list[RLMQuery]
+
+
+_M = TypeVar("_M", bound=BaseModel)
+
+
+def _body_errors(raw: bytes, model: type[BaseModel], json_error: ValidationError) -> list[dict]:
+    """The 422 `detail` FastAPI gives a typed body parameter for the same raw body.
+
+    Only runs on failure: replays FastAPI's json.loads + validate steps so missing bodies, JSON
+    decode errors and field errors keep its wording and ("body", ...) loc prefix.
+    """
+    if not raw:
+        return [{"type": "missing", "loc": ("body",), "msg": "Field required", "input": None}]
+    try:
+        data = json.loads(raw)
+    except json.JSONDecodeError as e:
+        return [{"type": "json_invalid", "loc": ("body", e.pos), "msg": "JSON decode error", "input": {}, "ctx": {"error": e.msg}}]
+    except ValueError as e:  # not UTF-8
+        raise HTTPException(status_code=400, detail="There was an error parsing the body") from e
+    try:
+        model.model_validate(data, from_attributes=True)
+    except ValidationError as e:
+        json_error = e
+    return [{**err, "loc": ("body", *err["loc"])} for err in json_error.errors(include_url=False)]
+
+
+async def _parse_body(request: Request, model: type[_M]) -> _M:
+    """Validate the raw body in one pydantic-core pass (no intermediate dict); 422 on failure like FastAPI."""
+    raw = await request.body()
+    try:
+        return model.model_validate_json(raw)
+    except ValidationError as e:
+        raise RequestValidationError(_body_errors(raw, model, e)) from e
+
+
+_SUMMARY_LIST = TypeAdapter(list[RLMSummary])
+
+
+def _json_response(payload: bytes) -> Response:
+    # Summaries come from our own loop, already validated: dump them in one pydantic-core pass instead
+    # of FastAPI's response_model re-validate + jsonable_encoder + json.dumps (~3 us vs ~11 us each).
+    # response_model stays on the routes for the OpenAPI schema only.
+    return Response(content=payload, media_type="application/json")
+
+
+def _json_body_schema(model: type[BaseModel]) -> dict:
+    # Raw-body handlers bypass FastAPI's body parsing; keep the request schema in OpenAPI.
+    return {
+        "requestBody": {
+            "required": True,
+            "content": {"application/json": {"schema": model.model_json_schema()}},
+        }
+    }
+
+
+# Set by the lifespan when PAGI_PIPELINE_WORKERS > 0; otherwise /rlm uses the shared threadpool directly.
+_dispatcher: Optional[Dispatcher] = None
+
+
+@asynccontextmanager
+async def _lifespan(_app: FastAPI) -> AsyncIterator[None]:
+    global _dispatcher
+    # Env is fixed for the life of the server: read PAGI_* once and pin it, so requests skip env lookups.
+    cfg = _reload_config()
+    # Start the orchestrator handshake at boot so the first delegated action doesn't pay for it.
+    if cfg.actions_via_grpc:
+        _prewarm_grpc_channel()
+    # Import allow-listed skills once now instead of on each skill's first dispatch.
+    if cfg.allow_local_dispatch:
+        _preload_local_skills()
+    _dispatcher = dispatcher_from_env()
+    if _dispatcher is not None:
+        _dispatcher.start()
+    try:
+        yield
+    finally:
+        if _dispatcher is not None:
+            await _dispatcher.stop()
+            _dispatcher = None
+        _clear_config()
+
+
+# Dict-returning routes (health, skills, debug) render through orjson when installed: same compact
+# bytes as JSONResponse, ~5x cheaper to encode. /rlm and /rlm-multi-turn dump their models directly.
+app = FastAPI(
+    title="pagi-intelligence-bridge",
+    version="0.1.0",
+    lifespan=_lifespan,
+    default_response_class=_DefaultResponse,
+)
 
 
 @app.get("/health")
@@ -49,6 +162,25 @@ def health_env() -> dict:
     }
 
 
+@app.get("/health/pipeline")
+def health_pipeline() -> dict:
+    """Dispatcher utilization counters (enabled=False when PAGI_PIPELINE_WORKERS is unset/0)."""
+    if _dispatcher is None:
+        return {"enabled": False}
+    return {"enabled": True, **_dispatcher.snapshot()}
+
+
+@app.get("/skills")
+def list_skills() -> dict:
+    """Registry skills with docstring summary and Params class (parsed from source, not imported)."""
+    return {
+        "skills": [
+            {"name": m.name, "doc": m.doc, "params": m.params_cls_name if m.has_params_cls else None}
+            for m in skill_index().values()
+        ]
+    }
+
+
 @app.post("/debug")
 def debug_trigger(data: dict) -> dict:
     """Stub to simulate error → self-heal flow; logs to agent_actions.log when PAGI_SELF_HEAL_LOG set."""
@@ -62,25 +194,58 @@ def debug_trigger(data: dict) -> dict:
     return {"status": "no error"}
 
 
-@app.post("/rlm", response_model=RLMSummary)
-def handle_rlm(query: RLMQuery) -> RLMSummary:
+@app.post("/rlm", response_model=RLMSummary, openapi_extra=_json_body_schema(RLMQuery))
+async def handle_rlm(request: Request) -> Response:
     """Run one RLM step: peek / delegate / synthesize. Delegation guarded by Rust via gRPC in production."""
-    return recursive_loop(query)
+    query = await _parse_body(request, RLMQuery)
+    if _dispatcher is not None:
+        out = await _dispatcher.submit(query)
+    else:
+        # recursive_loop blocks (file I/O, subprocess, gRPC); keep it off the event loop.
+        out = await run_in_threadpool(recursive_loop, query)
+    return _json_response(out.model_dump_json().encode())
+
+
+@app.post(
+    "/rlm-multi-turn",
+    response_model=list[RLMSummary],
+    openapi_extra=_json_body_schema(RLMMultiTurnRequest),
+)
+async def handle_rlm_multi_turn(request: Request) -> Response:
+    """Run multi-turn RLM: loop recursive_loop, inject summary as context until converged or max_turns. Returns list of RLMSummary."""
+    body = await _parse_body(request, RLMMultiTurnRequest)
+    summaries = await run_in_threadpool(_run_multi_turn, body)
+    return _json_response(_SUMMARY_LIST.dump_json(summaries))
+
+
+@app.post(
+    "/rlm-batch",
+    response_model=list[RLMSummary],
+    openapi_extra=_json_body_schema(RLMBatchRequest),
+)
+async def handle_rlm_batch(request: Request) -> Response:
+    """Run several independent RLM steps in one request: one body parse, one threadpool hop, one response."""
+    body = await _parse_body(request, RLMBatchRequest)
+    summaries = await run_in_threadpool(_run_batch, body.requests)
+    return _json_response(_SUMMARY_LIST.dump_json(summaries))
+
+
+def _run_batch(queries: list[RLMQuery]) -> list[RLMSummary]:
+    cfg = _current_config()
+    return [recursive_loop(q, cfg) for q in queries]
 
 
-@app.post("/rlm-multi-turn")
-def handle_rlm_multi_turn(body: RLMMultiTurnRequest) -> list[dict]:
-    """Run multi-turn RLM: loop recursive_loop, inject summary as context until converged or max_turns. Returns list of RLMSummary dicts."""
-    summaries: list[dict] = []
+def _run_multi_turn(body: RLMMultiTurnRequest) -> list[RLMSummary]:
+    # Models, not dicts: the handler dumps the list once through pydantic-core.
+    summaries: list[RLMSummary] = []
+    cfg = _current_config()
     query = RLMQuery(query=body.query, context=body.context, depth=body.depth)
     for _ in range(body.max_turns):
-        out = recursive_loop(query)
-        summaries.append(out.model_dump())
+        out = recursive_loop(query, cfg)
+        summaries.append(out)
         if out.converged:
             break
-        query = RLMQuery(
-            query=body.query,
-            context=(query.context + "\n" + out.summary).strip(),
-            depth=query.depth,
-        )
+        # Only context changes between turns; copy instead of re-validating the whole query.
+        # The full context is passed on: the loop bounds only its own working view of it.
+        query = query.model_copy(update={"context": (query.context + "\n" + out.summary).strip()})
     return summaries
@@ -9,6 +9,8 @@ Endpoints:
   - POST /api/memory          (AccessMemory equivalent)
   - POST /api/search          (SemanticSearch equivalent)
   - POST /api/upsert          (UpsertVectors equivalent)
+  - POST /api/search_batch    (N SemanticSearch requests in one round-trip)
+  - POST /api/upsert_batch    (N UpsertVectors requests in one round-trip)
   - POST /api/action          (ExecuteAction equivalent)
   - POST /api/rlm             (RLM single step)
   - WS   /ws/agent            (real-time AgentEvent stream)
@@ -16,14 +18,24 @@ Endpoints:
 
 from __future__ import annotations
 
+import asyncio
 import json
+import math
 import uuid
+from bisect import bisect_right
 from datetime import datetime, timezone
-from typing import Any
+from typing import Any, Iterator
 
+import numpy as np
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse, ORJSONResponse
 from pydantic import BaseModel, Field
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 # ---------------------------------------------------------------------------
 # Contract: 8 KB names (align with contract/types.ts KnowledgeBaseName)
 # ---------------------------------------------------------------------------
@@ -126,11 +138,27 @@ class RLMResponse(BaseModel):
 _l1: dict[str, bytes] = {}
 # L2: key -> string
 _l2: dict[str, str] = {}
-# L4: kb_name -> list of { id, vector, payload }; mock search uses simple string match
-_kbs: dict[str, list[dict[str, Any]]] = {name: [] for name in KNOWLEDGE_BASE_NAMES}
-
-
-def _memory_access(layer: int, key: str, value: str | None) -> MemoryAccessResponse:
+# L4 (structure of arrays): per KB, parallel id / payload / lowercased-content lists plus a float32
+# vector matrix. Text queries use substring match; a query_vector runs cosine top-k over the matrix.
+_kb_ids: dict[str, list[str]] = {name: [] for name in KNOWLEDGE_BASE_NAMES}
+_kb_payloads: dict[str, list[dict[str, str]]] = {name: [] for name in KNOWLEDGE_BASE_NAMES}
+# Index-time derivations of content/snippet, so queries never re-slice or re-lower:
+# the 500-char content_snippet returned in hits, and the lowercased text substring search scans.
+_kb_snippets: dict[str, list[str]] = {name: [] for name in KNOWLEDGE_BASE_NAMES}
+_kbs_lc: dict[str, list[str]] = {name: [] for name in KNOWLEDGE_BASE_NAMES}
+# kb_name -> (capacity, D) vector buffer and per-row L2 norms; rows [:len(_kb_ids[kb])] are live.
+# D is set by the KB's first upsert; capacity doubles to amortize growth.
+_kb_vectors: dict[str, np.ndarray] = {}
+_kb_norms: dict[str, np.ndarray] = {}
+# kb_name -> per-point vector lists, for a KB that received ragged or mixed-dimension vectors (which the
+# mock accepts, as it always has). Such a KB leaves the matrix path for good; vector search scans the lists.
+_kb_ragged: dict[str, list[list[float]]] = {}
+# kb_name -> ("\x00"-joined _kbs_lc, start offset per point); dropped on upsert, rebuilt on next search.
+_kbs_corpus: dict[str, tuple[str, list[int]]] = {}
+_CORPUS_SEP = "\x00"
+
+
+def _memory_access(layer: int, key: str, value: str | None) -> dict[str, Any]:
     if layer == 1:
         if value is not None:
             _l1[key] = value.encode("utf-8")
@@ -141,50 +169,204 @@ def _memory_access(layer: int, key: str, value: str | None) -> MemoryAccessRespo
         data = _l2.get(key, "")
     else:
         data = ""
-    return MemoryAccessResponse(data=data, success=True)
-
-
-def _search(query: str, kb_name: str, limit: int) -> SearchResponse:
-    if kb_name not in _kbs:
-        return SearchResponse(hits=[])
-    points = _kbs[kb_name]
+    return {"data": data, "success": True}
+
+
+def _corpus(kb_name: str) -> tuple[str, list[int]]:
+    cached = _kbs_corpus.get(kb_name)
+    # _kbs_lc only grows, so its length versions the cache (a threaded search may race an upsert).
+    if cached is None or len(cached[1]) != len(_kbs_lc[kb_name]):
+        lcs = list(_kbs_lc[kb_name])
+        starts: list[int] = []
+        pos = 0
+        for lc in lcs:
+            starts.append(pos)
+            pos += len(lc) + 1
+        cached = (_CORPUS_SEP.join(lcs), starts)
+        _kbs_corpus[kb_name] = cached
+    return cached
+
+
+def _matching_indices(kb_name: str, q: str) -> Iterator[int]:
+    """Indices of points whose lowercased content contains q, in upsert order.
+
+    One str.find pass over the joined corpus (C-level) instead of a Python `in` per point; after a
+    hit, the scan resumes at the next point's start so each point is reported at most once.
+    """
+    lcs = _kbs_lc[kb_name]
+    if not q:
+        yield from range(len(lcs))
+        return
+    if _CORPUS_SEP in q:
+        # A query containing the separator could match across points; use the per-point scan.
+        yield from (i for i, lc in enumerate(lcs) if q in lc)
+        return
+    corpus, starts = _corpus(kb_name)
+    pos = corpus.find(q)
+    while pos != -1:
+        i = bisect_right(starts, pos) - 1
+        yield i
+        if i + 1 >= len(starts):
+            return
+        pos = corpus.find(q, starts[i + 1])
+
+
+def _hit(ids: list[str], snippets: list[str], i: int, score: float) -> dict[str, Any]:
+    return {"document_id": ids[i], "score": score, "content_snippet": snippets[i]}
+
+
+def _cosine(a: list[float], b: list[float], b_norm: float) -> float:
+    denom = math.sqrt(sum(x * x for x in a)) * b_norm
+    return sum(x * y for x, y in zip(a, b)) / denom if denom > 0 else 0.0
+
+
+def _ragged_vector_search(kb_name: str, ids: list[str], query_vector: list[float], limit: int) -> dict[str, Any]:
+    """Per-point cosine over a ragged KB; points whose dimension differs from the query are skipped."""
+    q_norm = math.sqrt(sum(x * x for x in query_vector))
+    rows = _kb_ragged[kb_name]
+    scored = [
+        (i, _cosine(v, query_vector, q_norm))
+        for i, v in enumerate(rows[: len(ids)])
+        if len(v) == len(query_vector)
+    ]
+    scored.sort(key=lambda t: -t[1])
+    snippets = _kb_snippets[kb_name]
+    return {"hits": [_hit(ids, snippets, i, score) for i, score in scored[:limit]]}
+
+
+def _vector_search(kb_name: str, ids: list[str], query_vector: list[float], limit: int) -> dict[str, Any]:
+    """Cosine top-k over the KB matrix in one matmul; a dimension mismatch yields no hits."""
+    if kb_name in _kb_ragged:
+        return _ragged_vector_search(kb_name, ids, query_vector, limit)
+    n = len(ids)
+    buf = _kb_vectors.get(kb_name)
+    q = np.asarray(query_vector, dtype=np.float32)
+    if n == 0 or buf is None or q.shape != (buf.shape[1],):
+        return {"hits": []}
+    denom = _kb_norms[kb_name][:n] * np.linalg.norm(q)
+    scores = np.divide(buf[:n] @ q, denom, out=np.zeros(n, dtype=np.float32), where=denom > 0)
+    k = min(limit, n)
+    top = np.argpartition(-scores, k - 1)[:k]
+    top = top[np.argsort(-scores[top], kind="stable")]
+    snippets = _kb_snippets[kb_name]
+    return {"hits": [_hit(ids, snippets, int(i), float(scores[i])) for i in top]}
+
+
+def _search(query: str, kb_name: str, limit: int, query_vector: list[float] | None = None) -> dict[str, Any]:
+    """Single guard for unknown kb_name: one dict lookup, and the endpoints don't re-check."""
+    ids = _kb_ids.get(kb_name)
+    if ids is None:
+        return {"hits": []}
+    if query_vector:
+        return _vector_search(kb_name, ids, query_vector, limit)
     # Mock: filter by query substring in payload content/snippet
     q = query.lower()
-    hits: list[SearchHit] = []
-    for i, p in enumerate(points):
-        payload = p.get("payload", {})
-        content = (payload.get("content") or payload.get("snippet") or "").lower()
-        if q in content or not q:
-            hits.append(SearchHit(
-                document_id=p.get("id", str(i)),
-                score=0.9 - i * 0.05,
-                content_snippet=(payload.get("content") or payload.get("snippet") or "")[:500],
-            ))
+    snippets = _kb_snippets[kb_name]
+    if not q:
+        # Browse: the first `limit` points, no scan.
+        return {"hits": [_hit(ids, snippets, i, 0.9 - i * 0.05) for i in range(min(limit, len(ids)))]}
+    n = len(ids)
+    hits: list[dict[str, Any]] = []
+    for i in _matching_indices(kb_name, q):
+        if i >= n:
+            break
+        hits.append(_hit(ids, snippets, i, 0.9 - i * 0.05))
         if len(hits) >= limit:
             break
-    return SearchResponse(hits=hits[:limit])
-
-
-def _upsert(kb_name: str, points: list[VectorPoint]) -> UpsertVectorsResponse:
-    if kb_name not in _kbs:
-        return UpsertVectorsResponse(success=False, upserted_count=0)
-    for p in points:
-        _kbs[kb_name].append({
-            "id": p.id,
-            "vector": p.vector,
-            "payload": p.payload,
-        })
-    return UpsertVectorsResponse(success=True, upserted_count=len(points))
+    return {"hits": hits[:limit]}
+
+
+def _append_vectors(kb_name: str, new: np.ndarray) -> bool:
+    """Append rows to the KB matrix (amortized doubling); False if the dimension doesn't match the KB."""
+    n = len(_kb_ids[kb_name])
+    buf = _kb_vectors.get(kb_name)
+    if buf is not None and buf.shape[1] != new.shape[1]:
+        return False
+    if buf is None or n + len(new) > len(buf):
+        cap = max(len(buf) * 2 if buf is not None else 0, n + len(new), 16)
+        grown = np.empty((cap, new.shape[1]), dtype=np.float32)
+        grown_norms = np.empty(cap, dtype=np.float32)
+        if buf is not None:
+            grown[:n] = buf[:n]
+            grown_norms[:n] = _kb_norms[kb_name][:n]
+        _kb_vectors[kb_name], _kb_norms[kb_name] = grown, grown_norms
+    _kb_vectors[kb_name][n:n + len(new)] = new
+    _kb_norms[kb_name][n:n + len(new)] = np.linalg.norm(new, axis=1)
+    return True
+
+
+def _store_vectors(kb_name: str, points: list[VectorPoint]) -> None:
+    """Append the points' vectors: to the matrix while they fit it, else (from then on) as per-point lists."""
+    ragged = _kb_ragged.get(kb_name)
+    if ragged is None:
+        try:
+            new = np.asarray([p.vector for p in points], dtype=np.float32)
+        except ValueError:
+            new = None  # ragged vectors within one request
+        if new is not None and new.ndim == 2 and _append_vectors(kb_name, new):
+            return
+        # Leave the matrix path: move the live rows into lists, then append as-is.
+        n = len(_kb_ids[kb_name])
+        buf = _kb_vectors.pop(kb_name, None)
+        _kb_norms.pop(kb_name, None)
+        ragged = _kb_ragged[kb_name] = buf[:n].tolist() if buf is not None else []
+    ragged.extend(list(p.vector) for p in points)
+
+
+def _upsert(kb_name: str, points: list[VectorPoint]) -> dict[str, Any]:
+    ids = _kb_ids.get(kb_name)
+    if ids is None:
+        return {"success": False, "upserted_count": 0}
+    if not points:
+        return {"success": True, "upserted_count": 0}
+    _store_vectors(kb_name, points)
+    _kb_payloads[kb_name].extend(p.payload for p in points)
+    texts = [p.payload.get("content") or p.payload.get("snippet") or "" for p in points]
+    _kb_snippets[kb_name].extend(t[:500] for t in texts)
+    _kbs_lc[kb_name].extend(t.lower() for t in texts)
+    # ids last: len(ids) is the live point count a concurrent (threaded) search reads.
+    ids.extend(p.id for p in points)
+    _kbs_corpus.pop(kb_name, None)
+    return {"success": True, "upserted_count": len(points)}
+
+
+def _search_batch(reqs: list[SearchRequest]) -> list[dict[str, Any]]:
+    return [
+        _search(r.query, r.kb_name, r.limit, r.query_vector)
+        for r in reqs
+    ]
+
+
+def _upsert_batch(reqs: list[UpsertVectorsRequest]) -> list[dict[str, Any]]:
+    """Results align with reqs; points are grouped so each KB is appended to (and invalidated) once."""
+    grouped: dict[str, list[VectorPoint]] = {}
+    results: list[dict[str, Any]] = []
+    for r in reqs:
+        if r.kb_name not in _kb_ids:
+            results.append({"success": False, "upserted_count": 0})
+            continue
+        grouped.setdefault(r.kb_name, []).extend(r.points)
+        results.append({"success": True, "upserted_count": len(r.points)})
+    for kb_name, points in grouped.items():
+        _upsert(kb_name, points)
+    return results
 
 
 # ---------------------------------------------------------------------------
 # FastAPI app and routes
 # ---------------------------------------------------------------------------
 
+# Handlers are async: the stores are in-memory, so they run on the event loop with no threadpool hop.
+# Only a search over a large KB is pushed to a worker thread so the scan doesn't stall other requests.
+_SEARCH_OFFLOAD_THRESHOLD = 1000
+
+# Response models document the contract (OpenAPI `responses=`) but are not used to re-validate output:
+# helpers build plain dicts in the contract shape, serialized directly (orjson when installed).
 app = FastAPI(
     title="pagi-mock-provider",
     description="Contract-aligned mock backend for AGI desktop integration",
     version="1.0.0",
+    default_response_class=ORJSONResponse if orjson is not None else JSONResponse,
 )
 
 
@@ -197,52 +379,89 @@ def health() -> dict:
     }
 
 
-@app.post("/api/memory", response_model=MemoryAccessResponse)
-def api_memory(req: MemoryAccessRequest) -> MemoryAccessResponse:
+@app.post("/api/memory", response_model=None, responses={200: {"model": MemoryAccessResponse}})
+async def api_memory(req: MemoryAccessRequest) -> dict[str, Any]:
     return _memory_access(req.layer, req.key, req.value)
 
 
-@app.post("/api/search", response_model=SearchResponse)
-def api_search(req: SearchRequest) -> SearchResponse:
-    if req.kb_name not in KNOWLEDGE_BASE_NAMES:
-        return SearchResponse(hits=[])
-    return _search(req.query, req.kb_name, req.limit)
+@app.post("/api/search", response_model=None, responses={200: {"model": SearchResponse}})
+async def api_search(req: SearchRequest) -> dict[str, Any]:
+    if len(_kb_ids.get(req.kb_name, ())) > _SEARCH_OFFLOAD_THRESHOLD:
+        return await asyncio.to_thread(_search, req.query, req.kb_name, req.limit, req.query_vector)
+    return _search(req.query, req.kb_name, req.limit, req.query_vector)
 
 
-@app.post("/api/upsert", response_model=UpsertVectorsResponse)
-def api_upsert(req: UpsertVectorsRequest) -> UpsertVectorsResponse:
-    if req.kb_name not in KNOWLEDGE_BASE_NAMES:
-        return UpsertVectorsResponse(success=False, upserted_count=0)
+@app.post("/api/upsert", response_model=None, responses={200: {"model": UpsertVectorsResponse}})
+async def api_upsert(req: UpsertVectorsRequest) -> dict[str, Any]:
     return _upsert(req.kb_name, req.points)
 
 
-@app.post("/api/action", response_model=ExecuteActionResponse)
-def api_action(req: ExecuteActionRequest) -> ExecuteActionResponse:
+@app.post("/api/search_batch", response_model=None, responses={200: {"model": list[SearchResponse]}})
+async def api_search_batch(reqs: list[SearchRequest]) -> list[dict[str, Any]]:
+    scanned = sum(len(_kb_ids.get(r.kb_name, ())) for r in reqs)
+    if scanned > _SEARCH_OFFLOAD_THRESHOLD:
+        return await asyncio.to_thread(_search_batch, reqs)
+    return _search_batch(reqs)
+
+
+@app.post("/api/upsert_batch", response_model=None, responses={200: {"model": list[UpsertVectorsResponse]}})
+async def api_upsert_batch(reqs: list[UpsertVectorsRequest]) -> list[dict[str, Any]]:
+    return _upsert_batch(reqs)
+
+
+@app.post("/api/action", response_model=None, responses={200: {"model": ExecuteActionResponse}})
+async def api_action(req: ExecuteActionRequest) -> dict[str, Any]:
     rid = req.reasoning_id or str(uuid.uuid4())
-    return ExecuteActionResponse(
-        observation=f"Mock observation for skill={req.skill_name} (reasoning_id={rid})",
-        success=True,
-        error="",
-    )
+    return {
+        "observation": f"Mock observation for skill={req.skill_name} (reasoning_id={rid})",
+        "success": True,
+        "error": "",
+    }
 
 
-@app.post("/api/rlm", response_model=RLMResponse)
-def api_rlm(req: RLMRequest) -> RLMResponse:
-    return RLMResponse(
-        summary=f"Mock RLM summary for: {req.query[:80]}...",
-        converged=req.depth >= 1,
-    )
+@app.post("/api/rlm", response_model=None, responses={200: {"model": RLMResponse}})
+async def api_rlm(req: RLMRequest) -> dict[str, Any]:
+    return {
+        "summary": f"Mock RLM summary for: {req.query[:80]}...",
+        "converged": req.depth >= 1,
+    }
 
 
 # ---------------------------------------------------------------------------
 # WebSocket: /ws/agent — stream AgentEvent JSON (Contract §3)
 # ---------------------------------------------------------------------------
 
-def _emit(ws: WebSocket, event: str, payload: dict[str, Any], reasoning_id: str | None = None) -> None:
-    msg = {"event": event, "timestamp": _now_iso(), **payload}
+def _emit(
+    buf: list[dict[str, Any]],
+    event: str,
+    payload: dict[str, Any],
+    reasoning_id: str | None = None,
+    timestamp: str | None = None,
+) -> None:
+    """Queue one AgentEvent; nothing is sent until _flush. Pass timestamp to share one clock read across a batch."""
+    msg = {"event": event, "timestamp": timestamp or _now_iso(), **payload}
     if reasoning_id:
         msg["reasoning_id"] = reasoning_id
-    ws.send_text(json.dumps(msg))
+    buf.append(msg)
+
+
+def _dumps(obj: Any) -> str:
+    # Contract frames are JSON text; orjson (when installed) serializes in one C call.
+    if orjson is not None:
+        return orjson.dumps(obj).decode("utf-8")
+    return json.dumps(obj)
+
+
+async def _flush(ws: WebSocket, buf: list[dict[str, Any]], batch: bool = False) -> None:
+    """Send queued events: one JSON-array frame when the client opted into batching, else one frame per event."""
+    if not buf:
+        return
+    if batch:
+        await ws.send_text(_dumps(buf))
+    else:
+        for msg in buf:
+            await ws.send_text(_dumps(msg))
+    buf.clear()
 
 
 @app.websocket("/ws/agent")
@@ -250,32 +469,38 @@ async def ws_agent(websocket: WebSocket) -> None:
     await websocket.accept()
     session_id = str(uuid.uuid4())
     reasoning_id = str(uuid.uuid4())
+    buf: list[dict[str, Any]] = []
+    batch = False
 
     try:
-        # Optional: read first frame as handshake e.g. {"query": "..."}
+        # Optional: read first frame as handshake e.g. {"query": "...", "batch": true}
         try:
             raw = await websocket.receive_text()
             data = json.loads(raw) if raw else {}
             query = data.get("query", "mock query")
             depth = data.get("depth", 0)
+            batch = bool(data.get("batch", False))
         except (WebSocketDisconnect, json.JSONDecodeError):
             query = "mock query"
             depth = 0
 
-        _emit(websocket, "session_started", {"session_id": session_id, "query": query, "depth": depth})
+        # The mock sequence is produced in one go; read the clock once for all of it.
+        ts = _now_iso()
+        _emit(buf, "session_started", {"session_id": session_id, "query": query, "depth": depth}, timestamp=ts)
 
-        _emit(websocket, "thought", {"thought": "Mock reasoning step.", "depth": depth}, reasoning_id)
-        _emit(websocket, "action_planned", {
+        _emit(buf, "thought", {"thought": "Mock reasoning step.", "depth": depth}, reasoning_id, ts)
+        _emit(buf, "action_planned", {
             "skill_name": "peek_file", "params": {"path": "README.md"}, "depth": depth,
-        }, reasoning_id)
-        _emit(websocket, "action_started", {"skill_name": "peek_file"}, reasoning_id)
-        _emit(websocket, "action_completed", {
+        }, reasoning_id, ts)
+        _emit(buf, "action_started", {"skill_name": "peek_file"}, reasoning_id, ts)
+        _emit(buf, "action_completed", {
             "skill_name": "peek_file", "success": True, "observation": "Mock file content.",
-        }, reasoning_id)
-        _emit(websocket, "search_issued", {"kb_name": "kb_core", "query": query, "limit": 5}, reasoning_id)
-        _emit(websocket, "search_result", {"kb_name": "kb_core", "hits_count": 0, "top_snippet": None}, reasoning_id)
-        _emit(websocket, "converged", {"summary": "Mock converged.", "final_summary": "Mock final."}, reasoning_id)
-        _emit(websocket, "session_ended", {"session_id": session_id, "converged": True, "summary": "Mock summary."})
+        }, reasoning_id, ts)
+        _emit(buf, "search_issued", {"kb_name": "kb_core", "query": query, "limit": 5}, reasoning_id, ts)
+        _emit(buf, "search_result", {"kb_name": "kb_core", "hits_count": 0, "top_snippet": None}, reasoning_id, ts)
+        _emit(buf, "converged", {"summary": "Mock converged.", "final_summary": "Mock final."}, reasoning_id, ts)
+        _emit(buf, "session_ended", {"session_id": session_id, "converged": True, "summary": "Mock summary."}, timestamp=ts)
+        await _flush(websocket, buf, batch)
 
         # Keep connection open until client closes (or add heartbeat / timeout)
         while True:
@@ -287,6 +512,8 @@ async def ws_agent(websocket: WebSocket) -> None:
         pass
     except Exception as e:
         try:
-            _emit(websocket, "error", {"message": str(e), "component": "mock_provider"}, reasoning_id)
+            buf.clear()
+            _emit(buf, "error", {"message": str(e), "component": "mock_provider"}, reasoning_id)
+            await _flush(websocket, buf, batch)
         except Exception:
             pass
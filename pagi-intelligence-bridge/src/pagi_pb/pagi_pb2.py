@@ -24,7 +24,7 @@ _sym_db = _symbol_database.Default()
 
 
 
-DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\npagi.proto\x12\x04pagi\"\x07\n\x05\x45mpty\":\n\rMemoryRequest\x12\r\n\x05layer\x18\x01 \x01(\x05\x12\x0b\n\x03key\x18\x02 \x01(\t\x12\r\n\x05value\x18\x03 \x01(\t\"/\n\x0eMemoryResponse\x12\x0c\n\x04\x64\x61ta\x18\x01 \x01(\t\x12\x0f\n\x07success\x18\x02 \x01(\x08\"C\n\nRLMRequest\x12\x11\n\tsub_query\x18\x01 \x01(\t\x12\x13\n\x0bsub_context\x18\x02 \x01(\t\x12\r\n\x05\x64\x65pth\x18\x03 \x01(\x05\"1\n\x0bRLMResponse\x12\x0f\n\x07summary\x18\x01 \x01(\t\x12\x11\n\tconverged\x18\x02 \x01(\x08\"\xe8\x01\n\rActionRequest\x12\x12\n\nskill_name\x18\x01 \x01(\t\x12/\n\x06params\x18\x02 \x03(\x0b\x32\x1f.pagi.ActionRequest.ParamsEntry\x12\r\n\x05\x64\x65pth\x18\x03 \x01(\x05\x12\x14\n\x0creasoning_id\x18\x04 \x01(\t\x12\x11\n\tmock_mode\x18\x05 \x01(\x08\x12\x17\n\x0f\x61llow_list_hash\x18\x06 \x01(\t\x12\x12\n\ntimeout_ms\x18\x07 \x01(\r\x1a-\n\x0bParamsEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\t:\x02\x38\x01\"E\n\x0e\x41\x63tionResponse\x12\x13\n\x0bobservation\x18\x01 \x01(\t\x12\x0f\n\x07success\x18\x02 \x01(\x08\x12\r\n\x05\x65rror\x18\x03 \x01(\t\"\"\n\x0bHealRequest\x12\x13\n\x0b\x65rror_trace\x18\x01 \x01(\t\":\n\x0cHealResponse\x12\x16\n\x0eproposed_patch\x18\x01 \x01(\t\x12\x12\n\nauto_apply\x18\x02 \x01(\x08\"T\n\rSearchRequest\x12\r\n\x05query\x18\x01 \x01(\t\x12\x0f\n\x07kb_name\x18\x02 \x01(\t\x12\r\n\x05limit\x18\x03 \x01(\r\x12\x14\n\x0cquery_vector\x18\x04 \x03(\x02\"/\n\x0eSearchResponse\x12\x1d\n\x04hits\x18\x01 \x03(\x0b\x32\x0f.pagi.SearchHit\"H\n\tSearchHit\x12\x13\n\x0b\x64ocument_id\x18\x01 \x01(\t\x12\r\n\x05score\x18\x02 \x01(\x02\x12\x17\n\x0f\x63ontent_snippet\x18\x03 \x01(\t\"6\n\x0cPatchRequest\x12\x13\n\x0b\x65rror_trace\x18\x01 \x01(\t\x12\x11\n\tcomponent\x18\x02 \x01(\t\"O\n\rPatchResponse\x12\x10\n\x08patch_id\x18\x01 \x01(\t\x12\x15\n\rproposed_code\x18\x02 \x01(\t\x12\x15\n\rrequires_hitl\x18\x03 \x01(\x08\"\\\n\x0c\x41pplyRequest\x12\x10\n\x08patch_id\x18\x01 \x01(\t\x12\x10\n\x08\x61pproved\x18\x02 \x01(\x08\x12\x11\n\tcomponent\x18\x03 \x01(\t\x12\x15\n\rrequires_hitl\x18\x04 \x01(\x08\"5\n\rApplyResponse\x12\x0f\n\x07success\x18\x01 \x01(\x08\x12\x13\n\x0b\x63ommit_hash\x18\x02 \x01(\t\"C\n\rUpsertRequest\x12\x0f\n\x07kb_name\x18\x01 \x01(\t\x12!\n\x06points\x18\x02 \x03(\x0b\x32\x11.pagi.VectorPoint\"\x8a\x01\n\x0bVectorPoint\x12\n\n\x02id\x18\x01 \x01(\t\x12\x0e\n\x06vector\x18\x02 \x03(\x02\x12/\n\x07payload\x18\x03 \x03(\x0b\x32\x1e.pagi.VectorPoint.PayloadEntry\x1a.\n\x0cPayloadEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\t:\x02\x38\x01\"9\n\x0eUpsertResponse\x12\x0f\n\x07success\x18\x01 \x01(\x08\x12\x16\n\x0eupserted_count\x18\x02 \x01(\r2\xf8\x03\n\x04Pagi\x12\x39\n\x0c\x41\x63\x63\x65ssMemory\x12\x13.pagi.MemoryRequest\x1a\x14.pagi.MemoryResponse\x12\x32\n\x0b\x44\x65legateRLM\x12\x10.pagi.RLMRequest\x1a\x11.pagi.RLMResponse\x12:\n\rExecuteAction\x12\x13.pagi.ActionRequest\x1a\x14.pagi.ActionResponse\x12\x31\n\x08SelfHeal\x12\x11.pagi.HealRequest\x1a\x12.pagi.HealResponse\x12;\n\x0eSemanticSearch\x12\x13.pagi.SearchRequest\x1a\x14.pagi.SearchResponse\x12\x37\n\x0cProposePatch\x12\x12.pagi.PatchRequest\x1a\x13.pagi.PatchResponse\x12\x35\n\nApplyPatch\x12\x12.pagi.ApplyRequest\x1a\x13.pagi.ApplyResponse\x12:\n\rUpsertVectors\x12\x13.pagi.UpsertRequest\x1a\x14.pagi.UpsertResponse\x12)\n\rSimulateError\x12\x0b.pagi.Empty\x1a\x0b.pagi.Emptyb\x06proto3')
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\npagi.proto\x12\x04pagi\"\x07\n\x05\x45mpty\":\n\rMemoryRequest\x12\r\n\x05layer\x18\x01 \x01(\x05\x12\x0b\n\x03key\x18\x02 \x01(\t\x12\r\n\x05value\x18\x03 \x01(\t\"/\n\x0eMemoryResponse\x12\x0c\n\x04\x64\x61ta\x18\x01 \x01(\t\x12\x0f\n\x07success\x18\x02 \x01(\x08\"C\n\nRLMRequest\x12\x11\n\tsub_query\x18\x01 \x01(\t\x12\x13\n\x0bsub_context\x18\x02 \x01(\t\x12\r\n\x05\x64\x65pth\x18\x03 \x01(\x05\"1\n\x0bRLMResponse\x12\x0f\n\x07summary\x18\x01 \x01(\t\x12\x11\n\tconverged\x18\x02 \x01(\x08\"\xe8\x01\n\rActionRequest\x12\x12\n\nskill_name\x18\x01 \x01(\t\x12/\n\x06params\x18\x02 \x03(\x0b\x32\x1f.pagi.ActionRequest.ParamsEntry\x12\r\n\x05\x64\x65pth\x18\x03 \x01(\x05\x12\x14\n\x0creasoning_id\x18\x04 \x01(\t\x12\x11\n\tmock_mode\x18\x05 \x01(\x08\x12\x17\n\x0f\x61llow_list_hash\x18\x06 \x01(\t\x12\x12\n\ntimeout_ms\x18\x07 \x01(\r\x1a-\n\x0bParamsEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\t:\x02\x38\x01\"E\n\x0e\x41\x63tionResponse\x12\x13\n\x0bobservation\x18\x01 \x01(\t\x12\x0f\n\x07success\x18\x02 \x01(\x08\x12\r\n\x05\x65rror\x18\x03 \x01(\t\"\"\n\x0bHealRequest\x12\x13\n\x0b\x65rror_trace\x18\x01 \x01(\t\":\n\x0cHealResponse\x12\x16\n\x0eproposed_patch\x18\x01 \x01(\t\x12\x12\n\nauto_apply\x18\x02 \x01(\x08\"T\n\rSearchRequest\x12\r\n\x05query\x18\x01 \x01(\t\x12\x0f\n\x07kb_name\x18\x02 \x01(\t\x12\r\n\x05limit\x18\x03 \x01(\r\x12\x14\n\x0cquery_vector\x18\x04 \x03(\x02\"/\n\x0eSearchResponse\x12\x1d\n\x04hits\x18\x01 \x03(\x0b\x32\x0f.pagi.SearchHit\"H\n\tSearchHit\x12\x13\n\x0b\x64ocument_id\x18\x01 \x01(\t\x12\r\n\x05score\x18\x02 \x01(\x02\x12\x17\n\x0f\x63ontent_snippet\x18\x03 \x01(\t\"6\n\x0cPatchRequest\x12\x13\n\x0b\x65rror_trace\x18\x01 \x01(\t\x12\x11\n\tcomponent\x18\x02 \x01(\t\"O\n\rPatchResponse\x12\x10\n\x08patch_id\x18\x01 \x01(\t\x12\x15\n\rproposed_code\x18\x02 \x01(\t\x12\x15\n\rrequires_hitl\x18\x03 \x01(\x08\"\\\n\x0c\x41pplyRequest\x12\x10\n\x08patch_id\x18\x01 \x01(\t\x12\x10\n\x08\x61pproved\x18\x02 \x01(\x08\x12\x11\n\tcomponent\x18\x03 \x01(\t\x12\x15\n\rrequires_hitl\x18\x04 \x01(\x08\"5\n\rApplyResponse\x12\x0f\n\x07success\x18\x01 \x01(\x08\x12\x13\n\x0b\x63ommit_hash\x18\x02 \x01(\t\"C\n\rUpsertRequest\x12\x0f\n\x07kb_name\x18\x01 \x01(\t\x12!\n\x06points\x18\x02 \x03(\x0b\x32\x11.pagi.VectorPoint\"\xc7\x01\n\x0bVectorPoint\x12\n\n\x02id\x18\x01 \x01(\t\x12\x0e\n\x06vector\x18\x02 \x03(\x02\x12/\n\x07payload\x18\x03 \x03(\x0b\x32\x1e.pagi.VectorPoint.PayloadEntry\x12\x12\n\nvector_f16\x18\x04 \x01(\x0c\x12\x11\n\tvector_i8\x18\x05 \x01(\x0c\x12\x14\n\x0cvector_scale\x18\x06 \x01(\x02\x1a.\n\x0cPayloadEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\t:\x02\x38\x01\"9\n\x0eUpsertResponse\x12\x0f\n\x07success\x18\x01 \x01(\x08\x12\x16\n\x0eupserted_count\x18\x02 \x01(\r2\xbc\x04\n\x04Pagi\x12\x39\n\x0c\x41\x63\x63\x65ssMemory\x12\x13.pagi.MemoryRequest\x1a\x14.pagi.MemoryResponse\x12\x32\n\x0b\x44\x65legateRLM\x12\x10.pagi.RLMRequest\x1a\x11.pagi.RLMResponse\x12:\n\rExecuteAction\x12\x13.pagi.ActionRequest\x1a\x14.pagi.ActionResponse\x12\x31\n\x08SelfHeal\x12\x11.pagi.HealRequest\x1a\x12.pagi.HealResponse\x12;\n\x0eSemanticSearch\x12\x13.pagi.SearchRequest\x1a\x14.pagi.SearchResponse\x12\x37\n\x0cProposePatch\x12\x12.pagi.PatchRequest\x1a\x13.pagi.PatchResponse\x12\x35\n\nApplyPatch\x12\x12.pagi.ApplyRequest\x1a\x13.pagi.ApplyResponse\x12:\n\rUpsertVectors\x12\x13.pagi.UpsertRequest\x1a\x14.pagi.UpsertResponse\x12\x42\n\x13UpsertVectorsStream\x12\x13.pagi.UpsertRequest\x1a\x14.pagi.UpsertResponse(\x01\x12)\n\rSimulateError\x12\x0b.pagi.Empty\x1a\x0b.pagi.Emptyb\x06proto3')
 
 _globals = globals()
 _builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
@@ -72,11 +72,11 @@ if not _descriptor._USE_C_DESCRIPTORS:
   _globals['_UPSERTREQUEST']._serialized_start=1155
   _globals['_UPSERTREQUEST']._serialized_end=1222
   _globals['_VECTORPOINT']._serialized_start=1225
-  _globals['_VECTORPOINT']._serialized_end=1363
-  _globals['_VECTORPOINT_PAYLOADENTRY']._serialized_start=1317
-  _globals['_VECTORPOINT_PAYLOADENTRY']._serialized_end=1363
-  _globals['_UPSERTRESPONSE']._serialized_start=1365
-  _globals['_UPSERTRESPONSE']._serialized_end=1422
-  _globals['_PAGI']._serialized_start=1425
-  _globals['_PAGI']._serialized_end=1929
+  _globals['_VECTORPOINT']._serialized_end=1424
+  _globals['_VECTORPOINT_PAYLOADENTRY']._serialized_start=1378
+  _globals['_VECTORPOINT_PAYLOADENTRY']._serialized_end=1424
+  _globals['_UPSERTRESPONSE']._serialized_start=1426
+  _globals['_UPSERTRESPONSE']._serialized_end=1483
+  _globals['_PAGI']._serialized_start=1486
+  _globals['_PAGI']._serialized_end=2058
 # @@protoc_insertion_point(module_scope)
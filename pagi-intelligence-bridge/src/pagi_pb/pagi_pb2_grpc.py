@@ -74,6 +74,11 @@ class PagiStub(object):
                 request_serializer=pagi__pb2.UpsertRequest.SerializeToString,
                 response_deserializer=pagi__pb2.UpsertResponse.FromString,
                 _registered_method=True)
+        self.UpsertVectorsStream = channel.stream_unary(
+                '/pagi.Pagi/UpsertVectorsStream',
+                request_serializer=pagi__pb2.UpsertRequest.SerializeToString,
+                response_deserializer=pagi__pb2.UpsertResponse.FromString,
+                _registered_method=True)
         self.SimulateError = channel.unary_unary(
                 '/pagi.Pagi/SimulateError',
                 request_serializer=pagi__pb2.Empty.SerializeToString,
@@ -133,6 +138,13 @@ class PagiServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def UpsertVectorsStream(self, request_iterator, context):
+        """Client-streaming upsert: one UpsertRequest per embedded batch so embedding and network overlap.
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
     def SimulateError(self, request, context):
         """Missing associated documentation comment in .proto file."""
         context.set_code(grpc.StatusCode.UNIMPLEMENTED)
@@ -182,6 +194,11 @@ def add_PagiServicer_to_server(servicer, server):
                     request_deserializer=pagi__pb2.UpsertRequest.FromString,
                     response_serializer=pagi__pb2.UpsertResponse.SerializeToString,
             ),
+            'UpsertVectorsStream': grpc.stream_unary_rpc_method_handler(
+                    servicer.UpsertVectorsStream,
+                    request_deserializer=pagi__pb2.UpsertRequest.FromString,
+                    response_serializer=pagi__pb2.UpsertResponse.SerializeToString,
+            ),
             'SimulateError': grpc.unary_unary_rpc_method_handler(
                     servicer.SimulateError,
                     request_deserializer=pagi__pb2.Empty.FromString,
@@ -414,6 +431,33 @@ class Pagi(object):
             metadata,
             _registered_method=True)
 
+    @staticmethod
+    def UpsertVectorsStream(request_iterator,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.stream_unary(
+            request_iterator,
+            target,
+            '/pagi.Pagi/UpsertVectorsStream',
+            pagi__pb2.UpsertRequest.SerializeToString,
+            pagi__pb2.UpsertResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
     @staticmethod
     def SimulateError(request,
             target,
@@ -0,0 +1,41 @@
+"""Typed leaf helpers on the RLM hot path; optionally AOT-compiled with mypyc.
+
+Build from the bridge root with `make build-mypyc` (requires mypy). The compiled extension
+shadows this file on import; without it the pure-Python module is used unchanged.
+
+Keep this module free of pydantic/grpc imports and of anything tests patch: mypyc binds
+module-level calls early, so patched names here would be ignored by compiled callers.
+"""
+
+from __future__ import annotations
+
+import functools
+import os
+
+_TRUTHY = frozenset({"1", "true", "yes", "y", "on"})
+
+
+def env_truthy(name: str, default: bool = False) -> bool:
+    val = os.environ.get(name)
+    if val is None:
+        return default
+    return val.strip().lower() in _TRUTHY
+
+
+def strip_json_fences(text: str) -> str:
+    """Drop a leading ```/```json (any case) and a trailing ``` fence; plain slicing, no regex."""
+    s = text.strip()
+    if s.startswith("```"):
+        s = s[3:]
+        if s[:4].lower() == "json":
+            s = s[4:]
+        s = s.lstrip()
+    if s.endswith("```"):
+        s = s[:-3].rstrip()
+    return s
+
+
+@functools.lru_cache(maxsize=64)
+def params_class_name(skill_name: str) -> str:
+    """e.g. peek_file -> PeekFileParams, save_skill -> SaveSkillParams."""
+    return "".join(w.capitalize() for w in skill_name.split("_")) + "Params"
@@ -10,6 +10,15 @@ import re
 
 from pydantic import BaseModel
 
+# The indicators are ASCII tokens: re.ASCII keeps \b and case folding on ASCII tables (faster than
+# full Unicode folding); non-ASCII letters next to a token now count as a word boundary.
+_RE_SYNTAX_ERR = re.compile(r"\bSyntaxError\b", re.IGNORECASE | re.ASCII)
+_RE_RUST_PANIC = re.compile(r"\bpanic\s*!\s*\(?", re.ASCII)
+# Case-sensitive on purpose: "Panic" in prose is not a panic reference.
+_RE_PANIC_WORD = re.compile(r"\bpanic\b", re.ASCII)
+_RE_UNDEF = re.compile(r"undefined|NameError|AttributeError", re.IGNORECASE | re.ASCII)
+_RE_UNWRAP = re.compile(r"unwrap\s*\(\s*\)", re.ASCII)
+
 
 class AnalyzeCodeParams(BaseModel):
     code: str
@@ -24,17 +33,26 @@ def run(params: AnalyzeCodeParams) -> str:
         code = code[: params.max_length] + "\n# ... truncated"
     try:
         errors: list[str] = []
-        # Stub: regex search for common error indicators
-        if re.search(r"\bSyntaxError\b", code, re.IGNORECASE):
+        # Stub: regex search for common error indicators. Each regex runs only when its literal
+        # token is present, and starts at the token's first occurrence, so neither clean snippets
+        # nor hits deep in the snippet rescan the text before it.
+        code_lower = code.lower()
+        # Offsets found in code_lower apply to code only if lowering kept the length.
+        aligned = len(code_lower) == len(code)
+        i = code_lower.find("syntaxerror")
+        if i >= 0 and _RE_SYNTAX_ERR.search(code, i if aligned else 0):
             errors.append("SyntaxError mentioned")
-        if re.search(r"\bpanic\s*!\s*\(?", code):
-            errors.append("panic! (Rust) detected")
-        if re.search(r"\bpanic\b", code, re.IGNORECASE) and "panic!" not in code:
-            if re.search(r"\bpanic\b", code):
+        i = code.find("panic")
+        if i >= 0:
+            if _RE_RUST_PANIC.search(code, i):
+                errors.append("panic! (Rust) detected")
+            if "panic!" not in code and _RE_PANIC_WORD.search(code, i):
                 errors.append("panic reference")
-        if re.search(r"undefined|NameError|AttributeError", code, re.IGNORECASE):
+        hits = [j for j in map(code_lower.find, ("undefined", "nameerror", "attributeerror")) if j >= 0]
+        if hits and _RE_UNDEF.search(code, min(hits) if aligned else 0):
             errors.append("undefined/NameError/AttributeError pattern")
-        if re.search(r"unwrap\s*\(\s*\)", code):
+        i = code.find("unwrap")
+        if i >= 0 and _RE_UNWRAP.search(code, i):
             errors.append("unwrap() may panic")
         summary = "RCA summary: " + (
             "; ".join(errors) if errors else "No obvious error patterns found (stub analysis)."
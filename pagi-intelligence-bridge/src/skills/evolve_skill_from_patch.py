@@ -17,8 +17,13 @@ class EvolveSkillFromPatchParams(BaseModel):
     max_patch_chars: int = 8192
 
 
+# Resolved once at import; the skill runs from a fixed location.
+_SKILLS_DIR = Path(__file__).resolve().parent
+_BRIDGE_ROOT = _SKILLS_DIR.parent.parent  # src/skills -> src -> bridge root
+
+
 def _skills_dir() -> Path:
-    return Path(__file__).resolve().parent
+    return _SKILLS_DIR
 
 
 def run(params: EvolveSkillFromPatchParams) -> str:
@@ -54,8 +59,7 @@ def run(params: EvolvedParams) -> str:
 # ---
 '''
     path.write_text(stub, encoding="utf-8")
-    # Relative to bridge root (parent of src)
-    bridge_root = path.resolve().parent.parent.parent  # src/skills -> src -> bridge root
-    rel = path.resolve().relative_to(bridge_root)
+    # Relative to bridge root (parent of src); both paths were resolved at import.
+    rel = path.relative_to(_BRIDGE_ROOT)
     rel_str = str(rel).replace("\\", "/")
     return f"EVOLVED_PATH:{rel_str}"
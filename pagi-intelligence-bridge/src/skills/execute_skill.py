@@ -6,14 +6,21 @@ Gated by allow-list in recursive_loop; no broadening of execution surface.
 
 from __future__ import annotations
 
+import ast
+import functools
 import importlib.util
+import os
+import sys
+from dataclasses import dataclass
 from pathlib import Path
+from typing import Optional
 
 from pydantic import BaseModel, Field
 
 
 _REGISTRY_DIR = Path(__file__).resolve().parent
-_module_cache: dict[str, tuple[float, object]] = {}
+_module_cache: dict[str, tuple[tuple[int, int], object]] = {}
+_QUALNAME_PREFIX = "pagi_skills."
 
 
 class ExecuteSkillParams(BaseModel):
@@ -21,43 +28,114 @@ class ExecuteSkillParams(BaseModel):
     params: dict = Field(default_factory=dict)  # Forwarded to target skill's Params model
 
 
+@functools.lru_cache(maxsize=64)
 def _params_class_name(skill_name: str) -> str:
     """e.g. peek_file -> PeekFileParams, save_skill -> SaveSkillParams."""
     return "".join(w.capitalize() for w in skill_name.split("_")) + "Params"
 
 
+@dataclass(frozen=True)
+class SkillMeta:
+    """Registry metadata parsed from source with ast; the skill module is not executed."""
+
+    name: str
+    path: str
+    key: tuple[int, int]
+    doc: str  # First line of the module docstring ("" if none)
+    params_cls_name: str
+    has_params_cls: bool  # A top-level class with params_cls_name exists in the source
+
+
+# name -> SkillMeta; entries are re-parsed only when (st_mtime_ns, st_size) changes.
+_skill_index: dict[str, SkillMeta] = {}
+
+
+def _parse_skill_meta(name: str, path: str, key: tuple[int, int]) -> Optional[SkillMeta]:
+    try:
+        with open(path, "rb") as f:
+            tree = ast.parse(f.read(), filename=path)
+    except (OSError, SyntaxError, ValueError):
+        return None
+    doc = (ast.get_docstring(tree) or "").strip().split("\n", 1)[0]
+    params_cls_name = _params_class_name(name)
+    has_params_cls = any(isinstance(node, ast.ClassDef) and node.name == params_cls_name for node in tree.body)
+    return SkillMeta(name, path, key, doc, params_cls_name, has_params_cls)
+
+
+def skill_index() -> dict[str, SkillMeta]:
+    """Phase one of skill loading: name/doc/Params metadata for every registry skill, without imports.
+
+    Phase two (_load_skill_module) happens only when a skill is dispatched.
+    """
+    seen: set[str] = set()
+    with os.scandir(_REGISTRY_DIR) as it:
+        for entry in it:
+            name, ext = os.path.splitext(entry.name)
+            if ext != ".py" or name.startswith("_") or not entry.is_file():
+                continue
+            try:
+                st = entry.stat()
+            except OSError:
+                continue
+            key = (st.st_mtime_ns, st.st_size)
+            seen.add(name)
+            meta = _skill_index.get(name)
+            if meta is None or meta.key != key:
+                meta = _parse_skill_meta(name, entry.path, key)
+                if meta is None:
+                    _skill_index.pop(name, None)
+                    continue
+                _skill_index[name] = meta
+    for stale in _skill_index.keys() - seen:
+        del _skill_index[stale]
+    return dict(sorted(_skill_index.items()))
+
+
+def _load_skill_module(skill_name: str, skill_path: Path, key: tuple[int, int]):
+    """Import a registry skill, cached by (st_mtime_ns, st_size) (same strategy as recursive_loop).
+
+    Modules are registered in sys.modules as pagi_skills.<name> before executing, as the import
+    system does, so class creation (e.g. pydantic resolving annotations) can find its own module.
+    """
+    cached = _module_cache.get(skill_name)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+    qualname = f"{_QUALNAME_PREFIX}{skill_name}"
+    spec = importlib.util.spec_from_file_location(qualname, skill_path)
+    if spec is None or spec.loader is None:
+        return None
+    skill_mod = importlib.util.module_from_spec(spec)
+    sys.modules[qualname] = skill_mod
+    try:
+        spec.loader.exec_module(skill_mod)
+    except BaseException:
+        sys.modules.pop(qualname, None)
+        _module_cache.pop(skill_name, None)
+        raise
+    _module_cache[skill_name] = (key, skill_mod)
+    return skill_mod
+
+
 def run(params: ExecuteSkillParams) -> str:
     skill_path = _REGISTRY_DIR / f"{params.skill_name}.py"
-    if not skill_path.exists():
+    # One stat per call: it is both the existence check and the cache key.
+    try:
+        st = skill_path.stat()
+    except OSError:
         return f"[execute_skill] Skill not found: {params.skill_name}"
 
     try:
-        # Small perf win: cache imported modules by mtime (same strategy as recursive_loop).
-        try:
-            mtime = skill_path.stat().st_mtime
-            cached = _module_cache.get(params.skill_name)
-            if cached is not None and cached[0] == mtime:
-                skill_mod = cached[1]
-            else:
-                spec = importlib.util.spec_from_file_location(params.skill_name, skill_path)
-                if spec is None or spec.loader is None:
-                    return f"[execute_skill] Invalid module: {params.skill_name}"
-                skill_mod = importlib.util.module_from_spec(spec)
-                spec.loader.exec_module(skill_mod)
-                _module_cache[params.skill_name] = (mtime, skill_mod)
-        except OSError:
-            spec = importlib.util.spec_from_file_location(params.skill_name, skill_path)
-            if spec is None or spec.loader is None:
-                return f"[execute_skill] Invalid module: {params.skill_name}"
-            skill_mod = importlib.util.module_from_spec(spec)
-            spec.loader.exec_module(skill_mod)
+        skill_mod = _load_skill_module(params.skill_name, skill_path, (st.st_mtime_ns, st.st_size))
+        if skill_mod is None:
+            return f"[execute_skill] Invalid module: {params.skill_name}"
 
         params_cls_name = _params_class_name(params.skill_name)
         params_class = getattr(skill_mod, params_cls_name, None)
         if params_class is None:
             return f"[execute_skill] Params class not found: {params_cls_name}"
 
-        skill_params = params_class.model_validate(params.params)
+        # No forwarded params: the constructor fills defaults without model_validate's dict-input path.
+        skill_params = params_class.model_validate(params.params) if params.params else params_class()
         run_fn = getattr(skill_mod, "run", None)
         if run_fn is None:
             return f"[execute_skill] Skill missing run(): {params.skill_name}"
@@ -25,17 +25,20 @@ class GenerateNewSkillParams(BaseModel):
 
 
 _SAFE_STEM_RE = re.compile(r"[^a-zA-Z0-9_]+")
+_PY_DEF_RE = re.compile(r"\bdef\s+([a-zA-Z_][a-zA-Z0-9_]*)\b")
+# One pass finds whichever name comes first; a Python def still wins over an earlier Rust fn.
+_NAME_RE = re.compile(r"\bdef\s+(?P<py>[a-zA-Z_][a-zA-Z0-9_]*)\b|\bpub\s+fn\s+(?P<rs>[a-zA-Z_][a-zA-Z0-9_]*)\b")
 
 
 def _derive_name_hint(patch: str) -> str:
     """Heuristic: try to pick a stable-ish name from the patch content."""
     # Look for something that resembles a function/skill name in the patch.
-    m = re.search(r"\bdef\s+([a-zA-Z_][a-zA-Z0-9_]*)\b", patch)
+    m = _NAME_RE.search(patch)
     if m:
-        return m.group(1)
-    m = re.search(r"\bpub\s+fn\s+([a-zA-Z_][a-zA-Z0-9_]*)\b", patch)
-    if m:
-        return m.group(1)
+        if m.lastgroup == "py":
+            return m.group("py")
+        later_def = _PY_DEF_RE.search(patch, m.end())
+        return later_def.group(1) if later_def else m.group("rs")
     # Fallback: timestamped.
     return f"evolved_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
 
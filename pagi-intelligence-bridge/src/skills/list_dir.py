@@ -6,7 +6,9 @@ Allow-listed for local dispatch; Rust-mediated in production.
 
 from __future__ import annotations
 
+import heapq
 import os
+from operator import itemgetter
 from pathlib import Path
 from typing import Optional
 
@@ -31,14 +33,18 @@ def run(params: ListDirParams) -> str:
             p = params.pattern.strip().lower()
             suffix = p[1:] if p.startswith("*") else p
 
-        items = []
-        for entry in sorted(dir_path.iterdir(), key=lambda e: e.name.lower()):
-            if suffix and not entry.name.lower().endswith(suffix):
-                continue
-            items.append(f"{entry.name} {'(dir)' if entry.is_dir() else '(file)'}")
-            if len(items) >= params.max_items:
-                items.append("... [truncated]")
-                break
+        # scandir's DirEntry answers is_dir() from readdir data (no extra stat for plain entries);
+        # nsmallest keeps only the first max_items names instead of sorting the whole directory.
+        # Each name is lowered once and the (lowered, entry) pair serves both the filter and the sort key.
+        with os.scandir(dir_path) as it:
+            pairs = [(e.name.lower(), e) for e in it]
+        if suffix:
+            pairs = [pair for pair in pairs if pair[0].endswith(suffix)]
+        limit = max(params.max_items, 1)
+        selected = heapq.nsmallest(limit, pairs, key=itemgetter(0))
+        items = [f"{e.name} {'(dir)' if e.is_dir() else '(file)'}" for _, e in selected]
+        if items and len(items) >= params.max_items:
+            items.append("... [truncated]")
 
         if not items:
             return "[list_dir] Directory empty or no matches"
@@ -6,6 +6,7 @@ Allow-listed for local dispatch; Rust-mediated in production.
 
 from __future__ import annotations
 
+import heapq
 import os
 from pathlib import Path
 from typing import Optional
@@ -33,23 +34,26 @@ def run(params: ListFilesRecursiveParams) -> str:
             suffix = p[1:] if p.startswith("*") else (p if p.startswith(".") else f".{p}")
 
         collected: list[str] = []
-        base_resolved = base.resolve()
-        for root, dirs, files in os.walk(base_resolved, topdown=True):
-            root_path = Path(root).resolve()
-            try:
-                rel_parts = root_path.relative_to(base_resolved).parts
-            except ValueError:
-                rel_parts = ()
-            depth = len(rel_parts)
+        # os.walk does not follow symlinked dirs, so each root is a lexical descendant of base:
+        # its depth and relative path come from string slicing, with no resolve() per directory.
+        base_str = str(base)
+        prefix = base_str if base_str.endswith(os.sep) else base_str + os.sep
+        prefix_len = len(prefix)
+        for root, dirs, files in os.walk(base, topdown=True):
+            rel = root[prefix_len:] if len(root) > len(base_str) else ""
+            depth = rel.count(os.sep) + 1 if rel else 0
             if depth >= params.max_depth:
                 dirs.clear()
                 continue
-            rel_root = Path(*rel_parts) if rel_parts else Path(".")
-            for name in sorted(files):
-                if suffix and not name.lower().endswith(suffix):
-                    continue
-                rel_path = rel_root / name if rel_root != Path(".") else name
-                collected.append(str(rel_path).replace("\\", "/"))
+            rel_prefix = rel.replace(os.sep, "/") + "/" if rel else ""
+            if suffix:
+                files = [name for name in files if name.lower().endswith(suffix)]
+            # Only the first `take` names (in sorted order) can be listed before truncation, so wide
+            # directories get a partial sort instead of a full one.
+            take = max(params.max_items - len(collected), 1)
+            names = heapq.nsmallest(take, files) if len(files) > take else sorted(files)
+            for name in names:
+                collected.append(f"{rel_prefix}{name}".replace("\\", "/"))
                 if len(collected) >= params.max_items:
                     collected.append("... [truncated]")
                     return "\n".join(collected)
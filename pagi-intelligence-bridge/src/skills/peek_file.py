@@ -29,11 +29,36 @@ def run(params: PeekFileParams) -> str:
     if params.end < params.start:
         return "[peek_file] Invalid range"
 
+    n = params.end - params.start
     try:
+        if params.encoding.lower().replace("_", "-") in ("utf-8", "utf8"):
+            return _peek_utf8(params.path, params.start, n)
         with open(params.path, "r", encoding=params.encoding, errors="replace") as f:
             f.seek(params.start)
-            content = f.read(params.end - params.start)
+            content = f.read(n)
         return content
     except Exception as e:
         return f"[peek_file] Error: {type(e).__name__}: {e}"
 
+
+def _peek_utf8(path: str, start: int, n: int) -> str:
+    """Positioned read of n characters from byte offset start, same result as the text-mode path.
+
+    A UTF-8 character (or a CRLF pair, which universal newlines folds to one) spans at most 4 bytes,
+    so 4 * n bytes plus one (to see an LF right after a trailing CR) always cover n characters.
+    """
+    if n == 0:
+        return ""
+    fd = os.open(path, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+    try:
+        if hasattr(os, "pread"):
+            data = os.pread(fd, 4 * n + 1, start)
+        else:
+            os.lseek(fd, start, os.SEEK_SET)
+            data = os.read(fd, 4 * n + 1)
+    finally:
+        os.close(fd)
+    text = data.decode("utf-8", errors="replace")
+    if "\r" in text:
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return text[:n]
@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+import codecs
 from pathlib import Path
 
 from pydantic import BaseModel
@@ -20,10 +21,16 @@ def run(params: ReadEntireFileSafeParams) -> str:
         if not resolved.exists() or not resolved.is_file():
             return f"[read_entire_file_safe] Not a file or not found: {params.path}"
 
-        with open(
-            resolved, "r", encoding=params.encoding, errors="replace"
-        ) as f:
-            content = f.read(params.max_size_bytes)
+        # One bounded binary read and one decode instead of TextIOWrapper's per-chunk decoding.
+        with open(resolved, "rb") as f:
+            data = f.read(params.max_size_bytes)
+            truncated = bool(data) and len(data) == params.max_size_bytes and f.read(1) != b""
+        # When the cap splits a multi-byte character, drop the fragment rather than emit U+FFFD.
+        decoder = codecs.getincrementaldecoder(params.encoding)(errors="replace")
+        content = decoder.decode(data, final=not truncated)
+        if "\r" in content:
+            # Same newline folding as the text-mode read this replaces.
+            content = content.replace("\r\n", "\n").replace("\r", "\n")
         return content
     except Exception as e:
         return f"[read_entire_file_safe] Error: {type(e).__name__}: {e}"
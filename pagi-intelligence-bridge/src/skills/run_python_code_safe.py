@@ -2,8 +2,9 @@
 
 from __future__ import annotations
 
+import ctypes
+import functools
 import io
-import sys
 import threading
 from typing import Any
 
@@ -31,33 +32,57 @@ _SAFE_BUILTINS: set[str] = {
 }
 
 
-def _restricted_builtins() -> dict[str, Any]:
+def _build_restricted_builtins() -> dict[str, Any]:
     b = __builtins__ if isinstance(__builtins__, dict) else __builtins__.__dict__
     return {k: b[k] for k in _SAFE_BUILTINS if k in b}
 
 
+_SAFE_BUILTINS_DICT: dict[str, Any] = _build_restricted_builtins()
+
+
+def _restricted_builtins() -> dict[str, Any]:
+    # Fresh shallow copy per run: snippets can reach __builtins__ and must not leak edits into the next run.
+    return dict(_SAFE_BUILTINS_DICT)
+
+
+class _SandboxTimeout(BaseException):
+    """Injected into an overrunning snippet's thread; BaseException so `except Exception` can't swallow it."""
+
+
+def _interrupt(thread: threading.Thread) -> None:
+    # Best-effort stop for a snippet past its deadline: raise _SandboxTimeout in its thread at the next
+    # bytecode boundary. A snippet that catches BaseException keeps spinning (daemon thread), but the
+    # caller has already been answered.
+    if thread.ident is not None:
+        ctypes.pythonapi.PyThreadState_SetAsyncExc(ctypes.c_ulong(thread.ident), ctypes.py_object(_SandboxTimeout))
+
+
 def run(params: RunPythonCodeSafeParams) -> str:
-    """Execute code in restricted globals with timeout; capture stdout; return output or prefixed error."""
+    """Execute code in restricted globals with timeout; capture stdout; return output or prefixed error.
+
+    The snippet runs in a daemon thread joined with the timeout, so the wall-clock bound holds no
+    matter what the snippet catches. `print` is bound to a per-run buffer rather than swapping
+    sys.stdout, so the process-wide stream is never left redirected.
+    """
     code = params.code
     timeout_sec = max(1, min(params.timeout_sec, 30))
     max_out = max(0, min(params.max_output_len, 65536))
 
+    buf = io.StringIO()
+    builtins = _restricted_builtins()
+    builtins["print"] = functools.partial(print, file=buf)
     restricted_globals: dict[str, Any] = {
-        "__builtins__": _restricted_builtins(),
+        "__builtins__": builtins,
         "__name__": "__main__",
     }
     result_container: list[str | tuple[str, BaseException]] = []
 
     def run_code() -> None:
         try:
-            old = sys.stdout
-            sys.stdout = io.StringIO()
-            try:
-                exec(code, restricted_globals)
-                out = sys.stdout.getvalue()
-                result_container.append(out)
-            finally:
-                sys.stdout = old
+            exec(code, restricted_globals)
+            result_container.append(buf.getvalue())
+        except _SandboxTimeout:
+            pass
         except BaseException as e:
             result_container.append(("error", e))
 
@@ -66,6 +91,7 @@ def run(params: RunPythonCodeSafeParams) -> str:
     thread.join(timeout=timeout_sec)
 
     if thread.is_alive():
+        _interrupt(thread)
         return f"[run_python_code_safe] Execution timed out after {timeout_sec}s"
 
     if not result_container:
@@ -15,9 +15,10 @@ class RunTestsParams(BaseModel):
     timeout_sec: int = 30
 
 
-def _path_under_root(resolved: Path, root: Path) -> bool:
+def _path_under_root(resolved: Path, root_resolved: Path) -> bool:
+    """root_resolved must already be resolved (run() resolves PAGI_PROJECT_ROOT once)."""
     try:
-        resolved.relative_to(root.resolve())
+        resolved.relative_to(root_resolved)
         return True
     except ValueError:
         return False
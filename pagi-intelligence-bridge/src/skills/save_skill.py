@@ -13,14 +13,15 @@ from pathlib import Path
 from pydantic import BaseModel
 
 
+_SKILLS_DIR = Path(__file__).resolve().parent
+
+
 class SaveSkillParams(BaseModel):
     filename: str
     code: str
 
 
 def run(params: SaveSkillParams) -> str:
-    skills_dir = Path(__file__).resolve().parent
-
     # Basic path hardening; final allow-listing/sandboxing belongs to the executor.
     safe_name = (
         params.filename.strip()
@@ -31,7 +32,7 @@ def run(params: SaveSkillParams) -> str:
     if not safe_name.endswith(".py"):
         safe_name += ".py"
 
-    target = skills_dir / safe_name
+    target = _SKILLS_DIR / safe_name
     try:
         target.write_text(params.code, encoding="utf-8")
         return f"[save_skill] Saved → {target.name}"
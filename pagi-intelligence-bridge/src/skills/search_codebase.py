@@ -16,68 +16,96 @@ class SearchCodebaseParams(BaseModel):
     max_files: int = 50
 
 
-def _path_under_root(resolved: Path, root: Path) -> bool:
+def _path_under_root(resolved: Path, root_resolved: Path) -> bool:
+    """root_resolved must already be resolved (run() resolves PAGI_PROJECT_ROOT once)."""
     try:
-        resolved.relative_to(root.resolve())
+        resolved.relative_to(root_resolved)
         return True
     except ValueError:
         return False
 
 
-def _is_text_file(path: Path) -> bool:
+_SKIP_SUFFIXES = frozenset({".pyc", ".so", ".dll", ".exe", ".bin", ".png", ".jpg", ".ico", ".woff", ".ttf"})
+
+
+def _is_text_file(name: str) -> bool:
     """Heuristic: skip binary by extension and try decode."""
-    skip_suffixes = {".pyc", ".so", ".dll", ".exe", ".bin", ".png", ".jpg", ".ico", ".woff", ".ttf"}
-    if path.suffix.lower() in skip_suffixes:
-        return False
-    return True
+    return os.path.splitext(name)[1].lower() not in _SKIP_SUFFIXES
+
+
+def _walk_sorted(dir_path: str):
+    """Yield DirEntry objects lazily in sorted(Path.rglob("*")) order (pre-order, names sorted per dir).
+
+    Only one directory listing is held per level, so run() can stop after max_files without
+    materializing the tree. Symlinked dirs are listed but not descended, like rglob.
+    """
+    try:
+        with os.scandir(dir_path) as it:
+            entries = sorted(it, key=lambda e: e.name)
+    except OSError:
+        return
+    for entry in entries:
+        yield entry
+        if entry.is_dir(follow_symlinks=False):
+            yield from _walk_sorted(entry.path)
 
 
 def run(params: SearchCodebaseParams) -> str:
     """Resolve path, walk dir (cap at max_files), search for pattern; return file:line matches or prefixed error."""
     try:
-        root = Path(os.environ.get("PAGI_PROJECT_ROOT", ".")).resolve()
+        root_resolved = Path(os.environ.get("PAGI_PROJECT_ROOT", ".")).resolve()
         dir_path = Path(params.path).resolve()
         if not dir_path.exists():
             return f"[search_codebase] Path not found: {params.path}"
         if not dir_path.is_dir():
             return f"[search_codebase] Not a directory: {params.path}"
-        if not _path_under_root(dir_path, root):
+        if not _path_under_root(dir_path, root_resolved):
             return f"[search_codebase] Path outside project root: {params.path}"
 
+        # Keyword mode is a plain substring test; needle_b lets whole files be rejected on raw bytes
+        # before decoding (skipped if the needle itself is U+FFFD, which decoding could introduce).
+        needle_b: bytes | None = None
         if params.mode == "regex":
             try:
-                pattern_re = re.compile(params.pattern)
+                line_matches = re.compile(params.pattern).search
             except re.error as e:
                 return f"[search_codebase] Invalid regex: {e}"
         else:
-            pattern_str = re.escape(params.pattern)
+            needle = params.pattern
+
+            def line_matches(line: str) -> bool:
+                return needle in line
+
+            if "\ufffd" not in needle:
+                needle_b = needle.encode("utf-8")
 
         matches: list[str] = []
         files_processed = 0
 
-        for entry in sorted(dir_path.rglob("*")):
+        for entry in _walk_sorted(str(dir_path)):
             if files_processed >= params.max_files:
                 matches.append(f"... [truncated at {params.max_files} files]")
                 break
-            if not entry.is_file() or not _is_text_file(entry):
+            if not _is_text_file(entry.name) or not entry.is_file():
                 continue
+            entry_path = Path(entry.path)
             try:
-                if not _path_under_root(entry, root):
+                if not _path_under_root(entry_path, root_resolved):
                     continue
             except Exception:
                 continue
             files_processed += 1
             try:
-                content = entry.read_text(encoding="utf-8", errors="replace")
+                data = entry_path.read_bytes()
             except OSError:
                 continue
+            if needle_b is not None and needle_b not in data:
+                continue
+            # splitlines() breaks on \r\n / \r / \n like read_text's newline translation did.
+            content = data.decode("utf-8", errors="replace")
             for i, line in enumerate(content.splitlines(), start=1):
-                if params.mode == "regex":
-                    if pattern_re.search(line):
-                        matches.append(f"{entry}:{i}: {line.strip()[:200]}")
-                else:
-                    if pattern_str in line:
-                        matches.append(f"{entry}:{i}: {line.strip()[:200]}")
+                if line_matches(line):
+                    matches.append(f"{entry_path}:{i}: {line.strip()[:200]}")
 
         if not matches:
             return f"[search_codebase] No matches for pattern in {params.path} (files scanned: {files_processed})"
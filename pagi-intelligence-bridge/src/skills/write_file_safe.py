@@ -15,9 +15,10 @@ class WriteFileSafeParams(BaseModel):
     overwrite: bool = False
 
 
-def _path_under_root(resolved: Path, root: Path) -> bool:
+def _path_under_root(resolved: Path, root_resolved: Path) -> bool:
+    """root_resolved must already be resolved (run() resolves PAGI_PROJECT_ROOT once)."""
     try:
-        resolved.relative_to(root.resolve())
+        resolved.relative_to(root_resolved)
         return True
     except ValueError:
         return False
@@ -34,14 +35,21 @@ def run(params: WriteFileSafeParams) -> str:
         if resolved.exists() and not params.overwrite:
             return f"[write_file_safe] File exists and overwrite=false: {params.path}"
 
-        content = params.content
-        if len(content.encode("utf-8")) > params.max_content_bytes:
+        # Encode once: the same bytes serve the size check, the write and the reported length.
+        encoded = params.content.encode("utf-8")
+        if len(encoded) > params.max_content_bytes:
             # Truncate to fit max_content_bytes in UTF-8
-            encoded = content.encode("utf-8")
             content = encoded[: params.max_content_bytes].decode("utf-8", errors="replace")
+            encoded = content.encode("utf-8")
+        else:
+            content = params.content
 
         resolved.parent.mkdir(parents=True, exist_ok=True)
-        resolved.write_text(content, encoding="utf-8")
-        return f"[write_file_safe] Wrote {len(content.encode('utf-8'))} bytes to {resolved}"
+        if os.linesep == "\n":
+            resolved.write_bytes(encoded)
+        else:
+            # Keep text-mode newline translation where the platform has one (Windows).
+            resolved.write_text(content, encoding="utf-8")
+        return f"[write_file_safe] Wrote {len(encoded)} bytes to {resolved}"
     except Exception as e:
         return f"[write_file_safe] Error: {type(e).__name__}: {e}"
@@ -3,6 +3,96 @@
 import sys
 from pathlib import Path
 
+import pytest
+
 _root = Path(__file__).resolve().parent.parent
 if str(_root) not in sys.path:
     sys.path.insert(0, str(_root))
+
+
+@pytest.fixture(scope="session")
+def client():
+    """One TestClient for the session: lifespan runs once and the portal thread is reused per request."""
+    from fastapi.testclient import TestClient
+
+    from src.main import app
+    from src.recursive_loop import _clear_config
+
+    with TestClient(app) as c:
+        # Lifespan pins the env snapshot; unpin so tests' monkeypatched PAGI_* are read per request.
+        _clear_config()
+        yield c
+
+
+@pytest.fixture
+def rlm_env(monkeypatch):
+    """Set PAGI_* vars (None deletes) and pin the loop config once, as the server lifespan does.
+
+    Requests then read the pinned snapshot's attributes instead of re-reading os.environ each time.
+    """
+    from src.recursive_loop import _clear_config, _reload_config
+
+    def apply(**env):
+        for key, value in env.items():
+            if value is None:
+                monkeypatch.delenv(key, raising=False)
+            else:
+                monkeypatch.setenv(key, value)
+        return _reload_config()
+
+    yield apply
+    _clear_config()
+
+
+@pytest.fixture(scope="session")
+def peek_hello(tmp_path_factory) -> str:
+    """A session-wide "hello world" file for peek_file stubs; returns its path."""
+    p = tmp_path_factory.mktemp("peek") / "hello.txt"
+    p.write_text("hello world", encoding="utf-8")
+    return str(p)
+
+
+@pytest.fixture(scope="session")
+def sample_tree(tmp_path_factory):
+    """Read-only tree shared by listing tests: a.txt, b.md, a.py, sub/b.py. Tests that write use tmp_path."""
+    root = tmp_path_factory.mktemp("tree")
+    (root / "a.txt").write_text("a", encoding="utf-8")
+    (root / "b.md").write_text("b", encoding="utf-8")
+    (root / "a.py").write_text("a", encoding="utf-8")
+    sub = root / "sub"
+    sub.mkdir()
+    (sub / "b.py").write_text("b", encoding="utf-8")
+    return root
+
+
+@pytest.fixture
+def local_dispatch_env(monkeypatch):
+    """In-process skill dispatch: gRPC off, local allow-list on, mock mode off. Yields monkeypatch for extra vars."""
+    monkeypatch.setenv("PAGI_ACTIONS_VIA_GRPC", "false")
+    monkeypatch.setenv("PAGI_ALLOW_LOCAL_DISPATCH", "true")
+    monkeypatch.setenv("PAGI_MOCK_MODE", "false")
+    yield monkeypatch
+
+
+@pytest.fixture
+def grpc_dispatch_env(monkeypatch):
+    """Actions delegated over gRPC (tests patch _get_grpc_stub), local dispatch off. Yields monkeypatch."""
+    monkeypatch.setenv("PAGI_ACTIONS_VIA_GRPC", "true")
+    monkeypatch.setenv("PAGI_ALLOW_LOCAL_DISPATCH", "false")
+    yield monkeypatch
+
+
+@pytest.fixture
+def stub_response(monkeypatch):
+    """Install a pre-validated stub step via _STUB_MODEL_OVERRIDE, bypassing the PAGI_RLM_STUB_JSON env round-trip.
+
+    Tests of stub parsing itself (invalid JSON, schema failures) keep setting the env var.
+    """
+    import src.recursive_loop as rl
+
+    def apply(thought: str, action: dict | None = None, is_final: bool = True):
+        step = rl.RLMStructuredResponse.model_validate({"thought": thought, "action": action, "is_final": is_final})
+        monkeypatch.setattr(rl, "_STUB_MODEL_OVERRIDE", step)
+        return step
+
+    return apply
@@ -1,75 +1,197 @@
 """Minimal tests for Phase 3 RLM REPL (no outbound calls)."""
 
+import json
 import os
+from types import SimpleNamespace
 from unittest.mock import MagicMock, patch
 
 import pytest
 from fastapi.testclient import TestClient
 
-from src.main import app
 from src.recursive_loop import RLMSummary
 
-client = TestClient(app)
-
 
 def _mock_grpc_response(observation: str, success: bool = True, error: str = ""):
-    r = MagicMock()
-    r.observation = observation
-    r.success = success
-    r.error = error
-    return r
+    return SimpleNamespace(observation=observation, success=success, error=error)
 
 
-def test_health():
+def test_health(client):
     r = client.get("/health")
     assert r.status_code == 200
+    assert r.headers["content-type"].startswith("application/json")
     assert r.json()["service"] == "pagi-intelligence-bridge"
 
 
-def test_rlm_circuit_breaker():
-    """Depth >= 5 returns converged=False."""
-    r = client.post(
-        "/rlm",
-        json={"query": "test", "context": "", "depth": 5},
-    )
-    assert r.status_code == 200
-    data = r.json()
-    assert "summary" in data
-    assert data["converged"] is False
+class _Hello:
+    """Stands in for the session peek_hello path inside a dict stub; json.dumps swaps it in (and escapes it)."""
+
+
+_HELLO = _Hello()
+
+# (env, body, converged, summary_eq, summary_has): one POST /rlm per row, env pinned via rlm_env.
+# A dict env value is serialized with json.dumps.
+_RLM_SCENARIOS = [
+    # Depth >= 5 trips the circuit breaker.
+    pytest.param({}, {"query": "test", "context": "", "depth": 5}, False, None, None, id="circuit_breaker"),
+    pytest.param({}, {"query": "simple", "context": "resolved", "depth": 0}, True, None, None, id="simple"),
+    # Mock mode converges without outbound calls.
+    pytest.param({"PAGI_MOCK_MODE": "true"}, {"query": "plan a mock task", "context": "", "depth": 0}, True, None, "mock", id="mock_mode"),
+    # Structured JSON enforcement: a stub with is_final true converges on its thought.
+    pytest.param(
+        {"PAGI_MOCK_MODE": None, "PAGI_RLM_STUB_JSON": '{"thought":"done","action":null,"observation":null,"is_final":true}'},
+        {"query": "anything", "context": "", "depth": 0}, True, "done", None, id="stub_json_is_final",
+    ),
+    pytest.param(
+        {"PAGI_MOCK_MODE": None, "PAGI_RLM_STUB_JSON": "not-json"},
+        {"query": "anything", "context": "", "depth": 0}, False, None, "schema enforcement failed", id="stub_invalid_json",
+    ),
+    # The stub is validated like an LLM reply: well-formed JSON missing `thought` still fails.
+    pytest.param(
+        {"PAGI_MOCK_MODE": None, "PAGI_RLM_STUB_JSON": '{"action":null,"is_final":true}'},
+        {"query": "anything", "context": "", "depth": 0}, False, None, "schema enforcement failed", id="stub_missing_thought",
+    ),
+    # Gated local dispatch executes allow-listed L5 skills in-process (gRPC path off); one step returns the thought.
+    pytest.param(
+        {
+            "PAGI_ACTIONS_VIA_GRPC": "false",
+            "PAGI_ALLOW_LOCAL_DISPATCH": "true",
+            "PAGI_RLM_STUB_JSON": {
+                "thought": "peek please",
+                "action": {"skill_name": "peek_file", "params": {"path": _HELLO, "start": 0, "end": 5}},
+                "is_final": False,
+            },
+        },
+        {"query": "anything", "context": "", "depth": 0}, False, None, None, id="local_dispatch_peek_file",
+    ),
+]
 
 
-def test_rlm_simple():
-    """Simple query returns RLMSummary."""
-    r = client.post(
-        "/rlm",
-        json={"query": "simple", "context": "resolved", "depth": 0},
-    )
+@pytest.mark.parametrize("env,body,converged,summary_eq,summary_has", _RLM_SCENARIOS)
+def test_rlm_scenario(client, rlm_env, peek_hello, env, body, converged, summary_eq, summary_has):
+    """Set env, POST /rlm, check converged and the summary."""
+    rlm_env(**{k: json.dumps(v, default=lambda _: peek_hello) if isinstance(v, dict) else v for k, v in env.items()})
+    r = client.post("/rlm", json=body)
     assert r.status_code == 200
     data = r.json()
     assert "summary" in data
-    assert "converged" in data
-    assert data["converged"] is True
+    assert data["converged"] is converged
+    if summary_eq is not None:
+        assert data["summary"] == summary_eq
+    if summary_has is not None:
+        assert summary_has in data["summary"].lower()
+
+
+def test_rlm_batch_matches_unary(client, rlm_env):
+    """/rlm-batch returns, in order, what /rlm returns for each query alone."""
+    rlm_env(PAGI_MOCK_MODE=None, PAGI_RLM_STUB_JSON=None)
+    bodies = [
+        {"query": "test", "context": "", "depth": 5},
+        {"query": "simple", "context": "resolved", "depth": 0},
+        {"query": "other", "context": "", "depth": 1},
+    ]
+    r = client.post("/rlm-batch", json={"requests": bodies})
+    assert r.status_code == 200
+    assert r.json() == [client.post("/rlm", json=b).json() for b in bodies]
+    assert client.post("/rlm-batch", json={"requests": []}).json() == []
+    assert client.post("/rlm-batch", json={"requests": [{"context": ""}]}).status_code == 422
+
+
+_BAD_BODIES = [
+    pytest.param(b'{"context":""}', id="missing_field"),
+    pytest.param(b'{"query": "x",', id="malformed_json"),
+    pytest.param(b'{"query":"x"} junk', id="trailing_data"),
+    pytest.param(b"", id="empty"),
+    pytest.param(b"[]", id="not_an_object"),
+    pytest.param(b'{"query":"q","depth":"x"}', id="wrong_type"),
+    pytest.param(b'{"requests":[{"context":""}]}', id="nested_missing"),
+    pytest.param(b'{"query":"\xff"}', id="not_utf8"),
+]
+
+
+@pytest.fixture(scope="module")
+def typed_body_client():
+    """Reference app: the same bodies as FastAPI-typed parameters, i.e. FastAPI's own error format."""
+    from fastapi import FastAPI
+
+    from src.main import RLMBatchRequest, RLMMultiTurnRequest
+    from src.recursive_loop import RLMQuery
+
+    ref = FastAPI()
+
+    @ref.post("/rlm")
+    def rlm(body: RLMQuery) -> None: ...
+
+    @ref.post("/rlm-multi-turn")
+    def rlm_multi_turn(body: RLMMultiTurnRequest) -> None: ...
+
+    @ref.post("/rlm-batch")
+    def rlm_batch(body: RLMBatchRequest) -> None: ...
+
+    return TestClient(ref)
+
+
+@pytest.mark.parametrize("path", ["/rlm", "/rlm-multi-turn", "/rlm-batch"])
+@pytest.mark.parametrize("raw", _BAD_BODIES)
+def test_rlm_raw_body_errors_match_fastapi(client, typed_body_client, path, raw):
+    """Raw-body validation returns the status and full error body a typed FastAPI body parameter would."""
+    headers = {"content-type": "application/json"}
+    r = client.post(path, content=raw, headers=headers)
+    ref = typed_body_client.post(path, content=raw, headers=headers)
+    assert (r.status_code, r.json()) == (ref.status_code, ref.json())
+
+
+def test_rlm_422_body_format(client):
+    """Missing fields and malformed JSON keep the ("body", ...) loc clients read."""
+    headers = {"content-type": "application/json"}
+    for path in ("/rlm", "/rlm-multi-turn"):
+        r = client.post(path, content=b'{"context":""}', headers=headers)
+        assert r.status_code == 422
+        assert r.json() == {
+            "detail": [{"type": "missing", "loc": ["body", "query"], "msg": "Field required", "input": {"context": ""}}]
+        }
+        r = client.post(path, content=b'{"query": "x",', headers=headers)
+        assert r.status_code == 422
+        assert r.json() == {
+            "detail": [
+                {
+                    "type": "json_invalid",
+                    "loc": ["body", 14],
+                    "msg": "JSON decode error",
+                    "input": {},
+                    "ctx": {"error": "Expecting property name enclosed in double quotes"},
+                }
+            ]
+        }
+    r = client.post("/rlm-batch", content=b'{"requests":[{"context":""}]}', headers=headers)
+    assert r.status_code == 422
+    assert r.json() == {
+        "detail": [
+            {"type": "missing", "loc": ["body", "requests", 0, "query"], "msg": "Field required", "input": {"context": ""}}
+        ]
+    }
 
 
-def test_rlm_mock_mode_converges(monkeypatch):
-    """Mock mode should converge without outbound calls."""
-    monkeypatch.setenv("PAGI_MOCK_MODE", "true")
-    r = client.post(
-        "/rlm",
-        json={"query": "plan a mock task", "context": "", "depth": 0},
-    )
-    assert r.status_code == 200
+def test_rlm_response_dumped_directly_keeps_schema(client):
+    """/rlm bypasses response_model serialization but emits the same JSON and keeps the OpenAPI schema."""
+    r = client.post("/rlm", json={"query": "simple", "context": "résolu", "depth": 0})
+    assert r.headers["content-type"] == "application/json"
     data = r.json()
-    assert data["converged"] is True
-    assert "mock" in data["summary"].lower()
+    assert r.content == json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode()
+    assert list(data) == ["summary", "converged"]
+    resp = client.get("/openapi.json").json()["paths"]["/rlm"]["post"]["responses"]["200"]
+    assert resp["content"]["application/json"]["schema"] == {"$ref": "#/components/schemas/RLMSummary"}
+
 
+def test_rlm_stub_model_override_skips_json(client, monkeypatch):
+    """A pre-validated _STUB_MODEL_OVERRIDE takes precedence over PAGI_RLM_STUB_JSON."""
+    import src.recursive_loop as rl
 
-def test_rlm_structured_stub_json_is_final(monkeypatch):
-    """Structured JSON enforcement: stub response with is_final true should converge."""
     monkeypatch.delenv("PAGI_MOCK_MODE", raising=False)
-    monkeypatch.setenv(
-        "PAGI_RLM_STUB_JSON",
-        '{"thought":"done","action":null,"observation":null,"is_final":true}',
+    monkeypatch.setenv("PAGI_RLM_STUB_JSON", "not-json")
+    monkeypatch.setattr(
+        rl,
+        "_STUB_MODEL_OVERRIDE",
+        rl.RLMStructuredResponse(thought="prevalidated", is_final=True),
     )
     r = client.post(
         "/rlm",
@@ -78,78 +200,109 @@ def test_rlm_structured_stub_json_is_final(monkeypatch):
     assert r.status_code == 200
     data = r.json()
     assert data["converged"] is True
-    assert data["summary"] == "done"
+    assert data["summary"] == "prevalidated"
 
 
-def test_rlm_structured_invalid_json_reports_schema_failure(monkeypatch):
-    """Invalid JSON should return converged=False and include schema failure message."""
-    monkeypatch.delenv("PAGI_MOCK_MODE", raising=False)
-    monkeypatch.setenv("PAGI_RLM_STUB_JSON", "not-json")
-    r = client.post(
-        "/rlm",
-        json={"query": "anything", "context": "", "depth": 0},
-    )
-    assert r.status_code == 200
-    data = r.json()
-    assert data["converged"] is False
-    assert "schema enforcement failed" in data["summary"].lower()
+def test_rlm_invalid_stub_parsed_once(monkeypatch):
+    """A failing stub is cached as its error: repeated loops re-raise it without re-parsing."""
+    import src.recursive_loop as rl
 
+    rl._parse_stub_cached.cache_clear()
+    calls = []
+    real = rl._parse_structured_response
+    monkeypatch.setattr(rl, "_parse_structured_response", lambda raw: calls.append(raw) or real(raw))
+    for _ in range(3):
+        with pytest.raises(Exception) as exc:
+            rl._parse_stub("not-json-cached")
+        assert len(exc.traceback) <= 2
+    assert calls == ["not-json-cached"]
+    rl._parse_stub_cached.cache_clear()
 
-def test_local_dispatch_peek_file(monkeypatch, tmp_path):
-    """Gated local dispatch should execute allow-listed L5 skills in-process."""
-    # Ensure gRPC path isn't used.
-    monkeypatch.setenv("PAGI_ACTIONS_VIA_GRPC", "false")
-    monkeypatch.setenv("PAGI_ALLOW_LOCAL_DISPATCH", "true")
 
-    p = tmp_path / "hello.txt"
-    p.write_text("hello world", encoding="utf-8")
+def test_peek_file_max_chars_stops_early(tmp_path):
+    """peek_file streams the line range and caps the result at max_chars."""
+    from src.recursive_loop import peek_file
 
-    monkeypatch.setenv(
-        "PAGI_RLM_STUB_JSON",
-        (
-            '{'
-            '"thought":"peek please",'
-            '"action": {"skill_name":"peek_file","params":{"path":"%s","start":0,"end":5}},'
-            '"is_final": false'
-            '}'
-        )
-        % str(p).replace("\\", "\\\\"),
-    )
+    p = tmp_path / "lines.txt"
+    p.write_text("".join(f"line{i}\n" for i in range(100)), encoding="utf-8")
 
-    r = client.post(
-        "/rlm",
-        json={"query": "anything", "context": "", "depth": 0},
-    )
-    assert r.status_code == 200
-    data = r.json()
-    # One-step loop returns thought; execution happens and should not error.
-    assert "summary" in data
-    assert data["converged"] is False
+    assert peek_file(str(p), 1, 3) == "line1\nline2\n"
+    assert peek_file(str(p), 0, 100, max_chars=8) == "line0\nli"
+    assert peek_file(str(p), 0, 2, max_chars=1000) == "line0\nline1\n"
 
 
-def test_rlm_chained_execute_skill_peek_file(monkeypatch, tmp_path):
-    """README checklist: execute_skill(peek_file) chain with stub; converged and synthesis."""
-    monkeypatch.setenv("PAGI_ACTIONS_VIA_GRPC", "false")
-    monkeypatch.setenv("PAGI_ALLOW_LOCAL_DISPATCH", "true")
-    monkeypatch.delenv("PAGI_MOCK_MODE", raising=False)
-    monkeypatch.setenv("PAGI_MOCK_MODE", "false")
+def test_peek_file_index_matches_text_mode(tmp_path):
+    """Indexed peeks match a text-mode islice read, including after the file changes."""
+    import os
+    from itertools import islice
+
+    from src.recursive_loop import _peek_text, peek_file
+
+    p = tmp_path / "big.txt"
+    p.write_text("".join(f"é{i}\n" * (i % 3 + 1) for i in range(50)) + "tail", encoding="utf-8")
+
+    def ref(s, e):
+        with open(p, encoding="utf-8", errors="replace") as f:
+            return "".join(islice(f, s, e))
+
+    for s, e in [(0, 5), (40, 60), (95, 200), (300, 400), (3, 3)]:
+        assert peek_file(str(p), s, e) == ref(s, e)
+    assert peek_file(str(p), 10, 90, max_chars=7) == ref(10, 90)[:7]
+
+    p.write_text("a\nb\n", encoding="utf-8")
+    os.utime(p, ns=(1, 1))
+    assert peek_file(str(p), 1, 5) == "b\n"
+
+    crlf = tmp_path / "crlf.txt"
+    crlf.write_bytes(b"x\r\ny\rz\n")
+    assert peek_file(str(crlf), 1, 3) == _peek_text(crlf, 1, 3, None) == "y\nz\n"
+
+
+def test_peek_file_skill_positioned_read(tmp_path):
+    """peek_file skill: byte offset start, character count, universal newlines, replacement decoding."""
+    from src.skills.peek_file import PeekFileParams, run
 
+    p = tmp_path / "snip.txt"
+    p.write_bytes(b"ab\r\n\xc3\xa9x\ry\xffz")
+
+    assert run(PeekFileParams(path=str(p), start=0, end=5)) == "ab\néx"
+    assert run(PeekFileParams(path=str(p), start=5, end=50)) == "\ufffdx\ny\ufffdz"
+    assert run(PeekFileParams(path=str(p), start=3, end=3)) == ""
+    assert run(PeekFileParams(path=str(p), start=0, end=3, encoding="latin-1")) == "ab\n"
+
+
+def test_save_skill_compiles_in_process_by_default(monkeypatch, tmp_path):
+    """Without PAGI_SKILL_SUBPROCESS_VALIDATE, save_skill only compiles: no subprocess, syntax errors raise."""
+    import src.recursive_loop as rl
+
+    monkeypatch.setattr(rl, "_skills_dir", lambda: tmp_path)
+    monkeypatch.delenv("PAGI_SKILL_SUBPROCESS_VALIDATE", raising=False)
+
+    with patch("src.recursive_loop.subprocess.run") as run:
+        rl.save_skill("ok_skill", "def run(params):\n    return 'ok'\n")
+        with pytest.raises(ValueError, match="Skill validation failed"):
+            rl.save_skill("broken_skill", "def run(:\n")
+    run.assert_not_called()
+    assert (tmp_path / "ok_skill.py").is_file()
+
+
+@pytest.mark.usefixtures("local_dispatch_env")
+def test_rlm_chained_execute_skill_peek_file(client, stub_response, tmp_path):
+    """README checklist: execute_skill(peek_file) chain with stub; converged and synthesis."""
     peek_target = tmp_path / "README.md"
     peek_target.write_text("# Phoenix AGI\n\nBare-metal chain test.", encoding="utf-8")
 
-    stub = (
-        '{'
-        '"thought":"Peek README then synthesize.",'
-        '"action":{"skill_name":"execute_skill","params":{'
-        '"skill_name":"peek_file",'
-        '"params":{"path":"%s","start":0,"end":100},'
-        '"reasoning_id":"chained-1"'
-        '}},'
-        '"is_final":true'
-        '}'
-    ) % str(peek_target).replace("\\", "\\\\")
-
-    monkeypatch.setenv("PAGI_RLM_STUB_JSON", stub)
+    stub_response(
+        "Peek README then synthesize.",
+        {
+            "skill_name": "execute_skill",
+            "params": {
+                "skill_name": "peek_file",
+                "params": {"path": str(peek_target), "start": 0, "end": 100},
+                "reasoning_id": "chained-1",
+            },
+        },
+    )
 
     r = client.post(
         "/rlm",
@@ -166,211 +319,229 @@ def test_rlm_chained_execute_skill_peek_file(monkeypatch, tmp_path):
     assert "Peek" in data["summary"] or "synthesize" in data["summary"].lower()
 
 
-def test_local_dispatch_list_dir(monkeypatch, tmp_path):
-    """list_dir skill returns directory listing via local dispatch."""
-    monkeypatch.setenv("PAGI_ACTIONS_VIA_GRPC", "false")
-    monkeypatch.setenv("PAGI_ALLOW_LOCAL_DISPATCH", "true")
-    monkeypatch.delenv("PAGI_MOCK_MODE", raising=False)
-    monkeypatch.setenv("PAGI_MOCK_MODE", "false")
-
-    (tmp_path / "a.txt").write_text("a", encoding="utf-8")
-    (tmp_path / "b.md").write_text("b", encoding="utf-8")
-
-    path_arg = str(tmp_path).replace("\\", "\\\\")
-    stub = (
-        '{'
-        '"thought":"List directory.",'
-        '"action":{"skill_name":"list_dir","params":{"path":"%s","max_items":10}},'  # noqa: E501
-        '"is_final":true'
-        '}'
-    ) % path_arg
+def test_execute_skill_registers_and_reloads(monkeypatch, tmp_path):
+    """execute_skill registers skills as pagi_skills.<name> and reimports when the file changes."""
+    import sys
 
-    monkeypatch.setenv("PAGI_RLM_STUB_JSON", stub)
+    import src.skills.execute_skill as es
 
-    r = client.post(
-        "/rlm",
-        json={"query": "List files here", "context": "", "depth": 0},
+    monkeypatch.setattr(es, "_REGISTRY_DIR", tmp_path)
+    monkeypatch.setattr(es, "_module_cache", {})
+    skill = tmp_path / "echo_tmp.py"
+    src_tpl = (
+        "from pydantic import BaseModel\n"
+        "class EchoTmpParams(BaseModel):\n    word: str = ''\n"
+        "def run(p):\n    return '%s:' + p.word\n"
     )
-    assert r.status_code == 200
-    data = r.json()
-    assert data["converged"] is True
-    assert data["summary"] == "List directory."
-
-
-def test_local_dispatch_read_entire_file_safe(monkeypatch, tmp_path):
-    """read_entire_file_safe skill returns file content via local dispatch; summary contains snippet."""
-    monkeypatch.setenv("PAGI_ACTIONS_VIA_GRPC", "false")
-    monkeypatch.setenv("PAGI_ALLOW_LOCAL_DISPATCH", "true")
-    monkeypatch.delenv("PAGI_MOCK_MODE", raising=False)
-    monkeypatch.setenv("PAGI_MOCK_MODE", "false")
-
-    snippet = "syntax = \"proto3\"; package pagi;"
-    target = tmp_path / "pagi.proto"
-    target.write_text(snippet, encoding="utf-8")
+    skill.write_text(src_tpl % "v1", encoding="utf-8")
+    try:
+        assert es.run(es.ExecuteSkillParams(skill_name="echo_tmp", params={"word": "a"})) == "v1:a"
+        first = sys.modules["pagi_skills.echo_tmp"]
+        assert es.run(es.ExecuteSkillParams(skill_name="echo_tmp")) == "v1:"
+        assert sys.modules["pagi_skills.echo_tmp"] is first
+
+        skill.write_text(src_tpl % "v22", encoding="utf-8")
+        assert es.run(es.ExecuteSkillParams(skill_name="echo_tmp", params={"word": "b"})) == "v22:b"
+        assert sys.modules["pagi_skills.echo_tmp"] is not first
+    finally:
+        sys.modules.pop("pagi_skills.echo_tmp", None)
+
+
+def test_skill_index_parses_without_importing(client, monkeypatch, tmp_path):
+    """skill_index reads docstring/Params metadata from source and never executes the module."""
+    import sys
+
+    import src.skills.execute_skill as es
+
+    monkeypatch.setattr(es, "_REGISTRY_DIR", tmp_path)
+    monkeypatch.setattr(es, "_skill_index", {})
+    (tmp_path / "boom_tmp.py").write_text(
+        '"""Explodes on import.\n\nMore text."""\n'
+        "raise RuntimeError('imported')\n"
+        "class BoomTmpParams:\n    pass\n",
+        encoding="utf-8",
+    )
+    (tmp_path / "_private.py").write_text("", encoding="utf-8")
 
-    path_arg = str(target).replace("\\", "\\\\")
-    # Stub thought includes file content snippet so returned summary contains it
-    stub = (
-        '{'
-        '"thought":"Read entire file. Content: syntax = \\"proto3\\"; package pagi;",'
-        '"action":{"skill_name":"read_entire_file_safe","params":{"path":"%s","max_size_bytes":4096}},'  # noqa: E501
-        '"is_final":true'
-        '}'
-    ) % path_arg
+    index = es.skill_index()
+    assert list(index) == ["boom_tmp"]
+    meta = index["boom_tmp"]
+    assert (meta.doc, meta.params_cls_name, meta.has_params_cls) == ("Explodes on import.", "BoomTmpParams", True)
+    assert "pagi_skills.boom_tmp" not in sys.modules
 
-    monkeypatch.setenv("PAGI_RLM_STUB_JSON", stub)
+    (tmp_path / "boom_tmp.py").unlink()
+    assert es.skill_index() == {}
 
-    r = client.post(
-        "/rlm",
-        json={"query": "Read pagi.proto and summarize", "context": "", "depth": 0},
-    )
+    r = client.get("/skills")
+    assert r.status_code == 200
+    assert r.json() == {"skills": []}
+
+
+_PROTO_SNIPPET = 'syntax = "proto3"; package pagi;'
+_RUST_PANIC = 'fn main() { panic!("oops"); }'
+
+# (files, project_root, stub, query, check, files_after): files are written under tmp_path first;
+# project_root=True points PAGI_PROJECT_ROOT at tmp_path; stub(tmp_path, sample_tree) -> (thought, action).
+_LOCAL_DISPATCH_CASES = [
+    pytest.param(
+        {}, False,
+        lambda t, tree: ("List directory.", {"skill_name": "list_dir", "params": {"path": str(tree), "max_items": 10}}),
+        "List files here",
+        lambda s: s == "List directory.",
+        {},
+        id="list_dir",
+    ),
+    # Stub thought includes the file content snippet so the returned summary contains it.
+    pytest.param(
+        {"pagi.proto": _PROTO_SNIPPET}, False,
+        lambda t, tree: (
+            f"Read entire file. Content: {_PROTO_SNIPPET}",
+            {"skill_name": "read_entire_file_safe", "params": {"path": str(t / "pagi.proto"), "max_size_bytes": 4096}},
+        ),
+        "Read pagi.proto and summarize",
+        lambda s: "proto3" in s and "package" in s,
+        {},
+        id="read_entire_file_safe",
+    ),
+    pytest.param(
+        {}, False,
+        lambda t, tree: (
+            "Listed recursively.",
+            {
+                "skill_name": "list_files_recursive",
+                "params": {"path": str(tree), "pattern": "*.py", "max_depth": 2, "max_items": 50},
+            },
+        ),
+        "Recursively list py files here",
+        lambda s: "a.py" in s or "b.py" in s or "Listed" in s,
+        {},
+        id="list_files_recursive",
+    ),
+    pytest.param(
+        {}, True,
+        lambda t, tree: (
+            f"Write done. [write_file_safe] Wrote 5 bytes to {t / 'out.txt'}",
+            {"skill_name": "write_file_safe", "params": {"path": str(t / "out.txt"), "content": "hello", "overwrite": False}},
+        ),
+        "Write hello to out.txt",
+        lambda s: "Wrote" in s and "bytes" in s,
+        {"out.txt": "hello"},
+        id="write_file_safe",
+    ),
+    pytest.param(
+        {"a.rs": _RUST_PANIC, "b.py": "no panic here"}, True,
+        lambda t, tree: (
+            "Searched codebase for panic.",
+            {
+                "skill_name": "search_codebase",
+                "params": {"path": str(t), "pattern": "panic", "max_files": 50, "mode": "keyword"},
+            },
+        ),
+        "Search codebase for panic keywords",
+        lambda s: ("Matches" in s or "panic" in s) and ("a.rs" in s or "panic" in s),
+        {},
+        id="search_codebase",
+    ),
+    pytest.param(
+        {}, False,
+        lambda t, tree: (
+            "Analyzed code for RCA.",
+            {"skill_name": "analyze_code", "params": {"code": _RUST_PANIC, "language": "rust", "max_length": 4096}},
+        ),
+        "Analyze this code snippet for errors and propose fix",
+        lambda s: "RCA" in s,
+        {},
+        id="analyze_code",
+    ),
+]
+
+
+@pytest.mark.usefixtures("local_dispatch_env")
+@pytest.mark.parametrize("files,project_root,stub,query,check,files_after", _LOCAL_DISPATCH_CASES)
+def test_local_dispatch(client, monkeypatch, stub_response, tmp_path, sample_tree, files, project_root, stub, query, check, files_after):
+    """Allow-listed skill runs in-process via local dispatch; the final stub converges and the summary reflects it."""
+    for name, text in files.items():
+        (tmp_path / name).write_text(text, encoding="utf-8")
+    if project_root:
+        monkeypatch.setenv("PAGI_PROJECT_ROOT", str(tmp_path))
+    stub_response(*stub(tmp_path, sample_tree))
+
+    r = client.post("/rlm", json={"query": query, "context": "", "depth": 0})
     assert r.status_code == 200
     data = r.json()
     assert data["converged"] is True
-    assert "proto3" in data["summary"]
-    assert "package" in data["summary"]
+    assert check(data["summary"]), data["summary"]
+    for name, text in files_after.items():
+        assert (tmp_path / name).read_text() == text
 
 
-def test_local_dispatch_list_files_recursive(monkeypatch, tmp_path):
-    """list_files_recursive skill returns recursive listing via local dispatch; converged and summary contains expected file names."""
-    monkeypatch.setenv("PAGI_ACTIONS_VIA_GRPC", "false")
-    monkeypatch.setenv("PAGI_ALLOW_LOCAL_DISPATCH", "true")
-    monkeypatch.delenv("PAGI_MOCK_MODE", raising=False)
-    monkeypatch.setenv("PAGI_MOCK_MODE", "false")
+def test_read_entire_file_safe_byte_cap(tmp_path):
+    """read_entire_file_safe caps at max_size_bytes, drops a split trailing character, folds CRLF."""
+    from src.skills.read_entire_file_safe import ReadEntireFileSafeParams, run
 
-    (tmp_path / "a.py").write_text("a", encoding="utf-8")
-    sub = tmp_path / "sub"
-    sub.mkdir()
-    (sub / "b.py").write_text("b", encoding="utf-8")
-
-    path_arg = str(tmp_path).replace("\\", "\\\\")
-    stub = (
-        '{'
-        '"thought":"Listed recursively.",'
-        '"action":{"skill_name":"list_files_recursive","params":{"path":"%s","pattern":"*.py","max_depth":2,"max_items":50}},'
-        '"is_final":true'
-        '}'
-    ) % path_arg
+    p = tmp_path / "r.txt"
+    p.write_bytes("ab\r\né!".encode("utf-8"))
 
-    monkeypatch.setenv("PAGI_RLM_STUB_JSON", stub)
+    assert run(ReadEntireFileSafeParams(path=str(p))) == "ab\né!"
+    assert run(ReadEntireFileSafeParams(path=str(p), max_size_bytes=5)) == "ab\n"
+    assert run(ReadEntireFileSafeParams(path=str(p), max_size_bytes=6)) == "ab\né"
 
-    r = client.post(
-        "/rlm",
-        json={"query": "Recursively list py files here", "context": "", "depth": 0},
-    )
-    assert r.status_code == 200
-    data = r.json()
-    assert data["converged"] is True
-    assert "a.py" in data["summary"] or "b.py" in data["summary"] or "Listed" in data["summary"]
 
+def test_search_codebase_walk_order(monkeypatch, tmp_path):
+    """search_codebase visits the same files as sorted(rglob("*")), dot/bytecode dirs included, and stops at max_files."""
+    from src.skills.search_codebase import SearchCodebaseParams, run
 
-def test_local_dispatch_write_file_safe(monkeypatch, tmp_path):
-    """write_file_safe skill writes content via local dispatch; summary contains success message."""
-    monkeypatch.setenv("PAGI_ACTIONS_VIA_GRPC", "false")
-    monkeypatch.setenv("PAGI_ALLOW_LOCAL_DISPATCH", "true")
     monkeypatch.setenv("PAGI_PROJECT_ROOT", str(tmp_path))
-    monkeypatch.delenv("PAGI_MOCK_MODE", raising=False)
-    monkeypatch.setenv("PAGI_MOCK_MODE", "false")
+    for rel in (".git/HEAD", "__pycache__/m.txt", "a/z.txt", "a.txt", "b.txt", "node_modules/x/i.js"):
+        (tmp_path / rel).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / rel).write_text("needle", encoding="utf-8")
 
-    out_file = tmp_path / "out.txt"
-    path_arg = str(out_file).replace("\\", "\\\\")
-    stub = (
-        '{'
-        '"thought":"Write done. [write_file_safe] Wrote 5 bytes to %s",'
-        '"action":{"skill_name":"write_file_safe","params":{"path":"%s","content":"hello","overwrite":false}},'  # noqa: E501
-        '"is_final":true'
-        '}'
-    ) % (path_arg, path_arg)
+    expected = [f"{p}:1: needle" for p in sorted(tmp_path.rglob("*")) if p.is_file()]
+    out = run(SearchCodebaseParams(path=str(tmp_path), pattern="needle", max_files=50))
+    assert out.splitlines()[1:] == expected
 
-    monkeypatch.setenv("PAGI_RLM_STUB_JSON", stub)
+    out = run(SearchCodebaseParams(path=str(tmp_path), pattern="needle", max_files=2))
+    assert out.splitlines()[1:] == expected[:2] + ["... [truncated at 2 files]"]
 
-    r = client.post(
-        "/rlm",
-        json={"query": "Write hello to out.txt", "context": "", "depth": 0},
-    )
-    assert r.status_code == 200
-    data = r.json()
-    assert data["converged"] is True
-    assert "Wrote" in data["summary"]
-    assert "bytes" in data["summary"]
-    assert out_file.read_text() == "hello"
 
+def test_search_codebase_keyword_is_literal(monkeypatch, tmp_path):
+    """Keyword mode matches the raw pattern text, including regex metacharacters."""
+    from src.skills.search_codebase import SearchCodebaseParams, run
 
-def test_local_dispatch_search_codebase(monkeypatch, tmp_path):
-    """search_codebase skill returns matches via local dispatch; converged and summary contains matches."""
-    monkeypatch.setenv("PAGI_ACTIONS_VIA_GRPC", "false")
-    monkeypatch.setenv("PAGI_ALLOW_LOCAL_DISPATCH", "true")
     monkeypatch.setenv("PAGI_PROJECT_ROOT", str(tmp_path))
-    monkeypatch.delenv("PAGI_MOCK_MODE", raising=False)
-    monkeypatch.setenv("PAGI_MOCK_MODE", "false")
-
-    (tmp_path / "a.rs").write_text("fn main() { panic!(\"oops\"); }", encoding="utf-8")
-    (tmp_path / "b.py").write_text("no panic here", encoding="utf-8")
-
-    path_arg = str(tmp_path).replace("\\", "\\\\")
-    stub = (
-        '{'
-        '"thought":"Searched codebase for panic.",'
-        '"action":{"skill_name":"search_codebase","params":{"path":"%s","pattern":"panic","max_files":50,"mode":"keyword"}},'
-        '"is_final":true'
-        '}'
-    ) % path_arg
-
-    monkeypatch.setenv("PAGI_RLM_STUB_JSON", stub)
+    (tmp_path / "m.py").write_bytes(b"x = 1\r\nval = cfg.get(\"k\")\r\n")
+    (tmp_path / "other.py").write_text("cfgXget(", encoding="utf-8")
 
-    r = client.post(
-        "/rlm",
-        json={"query": "Search codebase for panic keywords", "context": "", "depth": 0},
-    )
-    assert r.status_code == 200
-    data = r.json()
-    assert data["converged"] is True
-    assert "Matches" in data["summary"] or "panic" in data["summary"]
-    assert "a.rs" in data["summary"] or "panic" in data["summary"]
+    out = run(SearchCodebaseParams(path=str(tmp_path), pattern="cfg.get(", mode="keyword"))
+    assert out.splitlines()[1:] == [f"{tmp_path / 'm.py'}:2: val = cfg.get(\"k\")"]
 
 
-def test_local_dispatch_run_tests(monkeypatch, tmp_path):
+@pytest.mark.usefixtures("local_dispatch_env")
+def test_local_dispatch_run_tests(client, monkeypatch, stub_response, tmp_path):
     """run_tests skill runs tests via local dispatch; monkeypatch subprocess to avoid real run; assert converged and passed in summary."""
-    monkeypatch.setenv("PAGI_ACTIONS_VIA_GRPC", "false")
-    monkeypatch.setenv("PAGI_ALLOW_LOCAL_DISPATCH", "true")
     monkeypatch.setenv("PAGI_PROJECT_ROOT", str(tmp_path))
-    monkeypatch.delenv("PAGI_MOCK_MODE", raising=False)
-    monkeypatch.setenv("PAGI_MOCK_MODE", "false")
 
-    result = MagicMock()
-    result.returncode = 0
-    result.stdout = "2 passed in 0.05s"
-    result.stderr = ""
+    result = SimpleNamespace(returncode=0, stdout="2 passed in 0.05s", stderr="")
 
-    path_arg = str(tmp_path).replace("\\", "\\\\")
-    stub = (
-        '{'
-        '"thought":"Tests passed.",'
-        '"action":{"skill_name":"run_tests","params":{"dir":"%s","type":"python","timeout_sec":30}},'
-        '"is_final":true'
-        '}'
-    ) % path_arg
-
-    monkeypatch.setenv("PAGI_RLM_STUB_JSON", stub)
+    stub_response(
+        "Tests passed.",
+        {"skill_name": "run_tests", "params": {"dir": str(tmp_path), "type": "python", "timeout_sec": 30}},
+    )
 
-    with patch("subprocess.run", return_value=result):
-        r = client.post(
-            "/rlm",
-            json={"query": "Run Python tests in bridge dir", "context": "", "depth": 0},
-        )
+    monkeypatch.setattr("subprocess.run", lambda *a, **kw: result)
+    r = client.post(
+        "/rlm",
+        json={"query": "Run Python tests in bridge dir", "context": "", "depth": 0},
+    )
     assert r.status_code == 200
     data = r.json()
     assert data["converged"] is True
     assert "passed" in data["summary"].lower()
 
 
-def test_local_dispatch_run_python_code_safe(monkeypatch):
+@pytest.mark.usefixtures("local_dispatch_env")
+def test_local_dispatch_run_python_code_safe(client, monkeypatch):
     """run_python_code_safe skill runs snippet in sandbox via local dispatch; assert converged and output reflected in summary."""
-    monkeypatch.setenv("PAGI_ACTIONS_VIA_GRPC", "false")
-    monkeypatch.setenv("PAGI_ALLOW_LOCAL_DISPATCH", "true")
-    monkeypatch.delenv("PAGI_MOCK_MODE", raising=False)
-    monkeypatch.setenv("PAGI_MOCK_MODE", "false")
-
     stub = (
         '{'
         '"thought":"Ran snippet. Output: 4",'
@@ -396,12 +567,38 @@ def test_local_dispatch_run_python_code_safe(monkeypatch):
     assert "[run_python_code_safe] Execution timed out" not in data["summary"]
 
 
-def test_rlm_grpc_dispatch_mock(monkeypatch):
+def test_run_python_code_safe_interrupts_runaway_code():
+    """The timeout is a hard wall-clock bound even when the snippet swallows every exception, in any thread."""
+    import sys
+    import threading
+    import time
+
+    from src.skills.run_python_code_safe import RunPythonCodeSafeParams, run
+
+    # Bare `except:` catches the injected interrupt; the loop is bounded (a few seconds) so the daemon
+    # thread it leaves behind finishes on its own instead of spinning for the rest of the session.
+    spin = RunPythonCodeSafeParams(
+        code="n = 0\nwhile n < 40_000_000:\n    try:\n        while n < 40_000_000:\n            n += 1\n    except:\n        pass\n",
+        timeout_sec=1,
+    )
+    t0 = time.perf_counter()
+    assert run(spin) == "[run_python_code_safe] Execution timed out after 1s"
+    assert time.perf_counter() - t0 < 2
+    stdout = sys.stdout
+    assert run(RunPythonCodeSafeParams(code="print(6 * 7)")) == "42"
+    assert sys.stdout is stdout
+
+    out: list[str] = []
+    worker = threading.Thread(target=lambda: out.append(run(RunPythonCodeSafeParams(code="print('t')"))))
+    worker.start()
+    worker.join()
+    assert out == ["t"]
+
+
+@pytest.mark.usefixtures("grpc_dispatch_env")
+def test_rlm_grpc_dispatch_mock(client, monkeypatch):
     """When PAGI_ACTIONS_VIA_GRPC=true and PAGI_MOCK_MODE=true, stub action gets mock observation in summary."""
-    monkeypatch.setenv("PAGI_ACTIONS_VIA_GRPC", "true")
     monkeypatch.setenv("PAGI_MOCK_MODE", "true")
-    monkeypatch.setenv("PAGI_ALLOW_LOCAL_DISPATCH", "false")
-    monkeypatch.delenv("PAGI_RLM_STUB_JSON", raising=False)
     monkeypatch.setenv(
         "PAGI_RLM_STUB_JSON",
         '{"thought":"Planned peek.","action":{"skill_name":"peek_file","params":{"path":"README.md","start":0,"end":10}},"is_final":true}',
@@ -423,17 +620,52 @@ def test_rlm_grpc_dispatch_mock(monkeypatch):
     assert "mock" in data["summary"].lower() or "Planned" in data["summary"]
 
 
-def test_rlm_grpc_dispatch_real_allowed(monkeypatch, tmp_path):
-    """When PAGI_ACTIONS_VIA_GRPC=true and PAGI_ALLOW_REAL_DISPATCH=true, stub peek_file returns real obs in summary."""
+def test_grpc_action_request_fields(monkeypatch):
+    """ActionRequest carries timeout_ms only under real dispatch and stringifies params."""
+    import src.recursive_loop as rl
+
     monkeypatch.setenv("PAGI_ACTIONS_VIA_GRPC", "true")
+    mock_stub = MagicMock()
+    mock_stub.ExecuteAction.return_value = _mock_grpc_response("ok")
+    action = rl.ActionSpec(skill_name="peek_file", params={"path": "a.txt", "end": 5})
+
+    with patch("src.recursive_loop._get_grpc_stub", return_value=mock_stub):
+        for real, timeout in (("false", 0), ("true", 10000)):
+            monkeypatch.setenv("PAGI_ALLOW_REAL_DISPATCH", real)
+            assert rl._execute_action(action, depth=1, reasoning_id="rid", mock_mode=False) == ("ok", True, "")
+            req = mock_stub.ExecuteAction.call_args[0][0]
+            assert req.timeout_ms == timeout
+            assert dict(req.params) == {"path": "a.txt", "end": "5"}
+            assert (req.skill_name, req.depth, req.reasoning_id) == ("peek_file", 1, "rid")
+
+
+def test_bare_metal_dispatch_table(monkeypatch, tmp_path):
+    """Without gRPC or local dispatch, actions route through the bare-metal table."""
+    import src.recursive_loop as rl
+
+    for var in ("PAGI_ACTIONS_VIA_GRPC", "PAGI_ALLOW_LOCAL_DISPATCH", "PAGI_MOCK_MODE"):
+        monkeypatch.delenv(var, raising=False)
+    p = tmp_path / "notes.txt"
+    p.write_text("a\nb\nc\n", encoding="utf-8")
+
+    peek = rl.ActionSpec(skill_name="peek_file", params={"path": str(p), "start": 1, "end": 2})
+    assert rl._execute_action(peek, depth=0, reasoning_id="r", mock_mode=False) == ("b\n", True, "")
+    bogus = rl.ActionSpec(skill_name="nope", params={})
+    assert rl._execute_action(bogus, depth=0, reasoning_id="r", mock_mode=False) == (
+        "Unknown skill",
+        False,
+        "unknown_skill:nope",
+    )
+
+
+@pytest.mark.usefixtures("grpc_dispatch_env")
+def test_rlm_grpc_dispatch_real_allowed(client, monkeypatch, stub_response, tmp_path):
+    """When PAGI_ACTIONS_VIA_GRPC=true and PAGI_ALLOW_REAL_DISPATCH=true, stub peek_file returns real obs in summary."""
     monkeypatch.setenv("PAGI_ALLOW_REAL_DISPATCH", "true")
-    monkeypatch.setenv("PAGI_ALLOW_LOCAL_DISPATCH", "false")
     (tmp_path / "README.md").write_text("Real peek content", encoding="utf-8")
-    path_arg = str(tmp_path / "README.md").replace("\\", "\\\\")
-    monkeypatch.setenv(
-        "PAGI_RLM_STUB_JSON",
-        '{"thought":"Peeked.","action":{"skill_name":"peek_file","params":{"path":"%s","start":0,"end":20}},"is_final":true}'
-        % path_arg,
+    stub_response(
+        "Peeked.",
+        {"skill_name": "peek_file", "params": {"path": str(tmp_path / "README.md"), "start": 0, "end": 20}},
     )
 
     mock_stub = MagicMock()
@@ -452,11 +684,10 @@ def test_rlm_grpc_dispatch_real_allowed(monkeypatch, tmp_path):
     assert "Peeked" in data["summary"] or "Real" in data["summary"]
 
 
-def test_rlm_grpc_dispatch_timeout(monkeypatch):
+@pytest.mark.usefixtures("grpc_dispatch_env")
+def test_rlm_grpc_dispatch_timeout(client, monkeypatch):
     """When gRPC returns timeout error, summary reflects failure."""
-    monkeypatch.setenv("PAGI_ACTIONS_VIA_GRPC", "true")
     monkeypatch.setenv("PAGI_ALLOW_REAL_DISPATCH", "true")
-    monkeypatch.setenv("PAGI_ALLOW_LOCAL_DISPATCH", "false")
     monkeypatch.setenv(
         "PAGI_RLM_STUB_JSON",
         '{"thought":"Timed out.","action":{"skill_name":"peek_file","params":{"path":"x","start":0,"end":10}},"is_final":true}',
@@ -478,45 +709,28 @@ def test_rlm_grpc_dispatch_timeout(monkeypatch):
     assert "Timed out" in data["summary"] or "timed out" in data["summary"].lower()
 
 
-def test_local_dispatch_analyze_code(monkeypatch):
-    """analyze_code skill returns RCA summary via local dispatch; converged and summary contains RCA."""
-    monkeypatch.setenv("PAGI_ACTIONS_VIA_GRPC", "false")
-    monkeypatch.setenv("PAGI_ALLOW_LOCAL_DISPATCH", "true")
-    monkeypatch.delenv("PAGI_MOCK_MODE", raising=False)
-    monkeypatch.setenv("PAGI_MOCK_MODE", "false")
-
-    code_snippet = 'fn main() { panic!("oops"); }'
-    import json
-    params = {"code": code_snippet, "language": "rust", "max_length": 4096}
-    stub = (
-        '{'
-        '"thought":"Analyzed code for RCA.",'
-        '"action":{"skill_name":"analyze_code","params":%s},'
-        '"is_final":true'
-        '}'
-    ) % json.dumps(params)
-
-    monkeypatch.setenv("PAGI_RLM_STUB_JSON", stub)
+@pytest.mark.parametrize(
+    "code,expected",
+    [
+        ("x = 1", "No obvious error patterns found (stub analysis)."),
+        ("raise syntaxerror", "SyntaxError mentioned"),
+        ('panic!("boom") and panic', "panic! (Rust) detected"),
+        ("kernel panic now", "panic reference"),
+        ("Panic at the disco", "No obvious error patterns found (stub analysis)."),
+        ("NameError; x.unwrap ( )", "undefined/NameError/AttributeError pattern; unwrap() may panic"),
+    ],
+)
+def test_analyze_code_patterns(code, expected):
+    """analyze_code reports each error indicator once, in a fixed order."""
+    from src.skills.analyze_code import AnalyzeCodeParams, run
 
-    r = client.post(
-        "/rlm",
-        json={
-            "query": "Analyze this code snippet for errors and propose fix",
-            "context": "",
-            "depth": 0,
-        },
-    )
-    assert r.status_code == 200
-    data = r.json()
-    assert data["converged"] is True
-    assert "RCA" in data["summary"]
+    assert run(AnalyzeCodeParams(code=code)) == f"RCA summary: {expected}"
 
 
-def test_rlm_multi_turn(monkeypatch):
+def test_rlm_multi_turn(client, monkeypatch):
     """POST /rlm-multi-turn returns list of RLMSummary; stub forces 2 turns, last converged=true."""
     monkeypatch.setenv("PAGI_ACTIONS_VIA_GRPC", "false")
     monkeypatch.setenv("PAGI_ALLOW_LOCAL_DISPATCH", "false")
-    monkeypatch.delenv("PAGI_MOCK_MODE", raising=False)
     monkeypatch.setenv("PAGI_MOCK_MODE", "false")
     monkeypatch.setenv(
         "PAGI_RLM_STUB_JSON",
@@ -545,119 +759,357 @@ def test_rlm_multi_turn(monkeypatch):
     assert summaries[-1]["summary"] == "turn2"
 
 
-def test_rlm_vertical_self_patch(monkeypatch, tmp_path):
-    """Vertical research: self-patch query with error_trace returns converged and summary contains proposed fix."""
-    monkeypatch.setenv("PAGI_VERTICAL_USE_CASE", "research")
-    monkeypatch.setenv("PAGI_ACTIONS_VIA_GRPC", "false")
-    monkeypatch.setenv("PAGI_ALLOW_LOCAL_DISPATCH", "true")
-    monkeypatch.setenv("PAGI_PROJECT_ROOT", str(tmp_path))
-    monkeypatch.delenv("PAGI_MOCK_MODE", raising=False)
+def _multi_turn_contexts(client, context: str, summaries: list[str]) -> list[str]:
+    """Contexts the loop sees on each /rlm-multi-turn turn when it returns `summaries` in order."""
+    contexts: list[str] = []
+
+    def fake_loop(query, cfg=None):
+        contexts.append(query.context)
+        return RLMSummary(summary=summaries[len(contexts) - 1], converged=len(contexts) == len(summaries))
+
+    with patch("src.main.recursive_loop", side_effect=fake_loop):
+        r = client.post("/rlm-multi-turn", json={"query": "q", "context": context, "max_turns": len(summaries)})
+    assert r.status_code == 200
+    return contexts
+
+
+def _baseline_contexts(context: str, summaries: list[str]) -> list[str]:
+    """Per-turn contexts of the original single-string accumulation."""
+    out = [context]
+    for summary in summaries[:-1]:
+        context = (context + "\n" + summary).strip()
+        out.append(context)
+    return out
+
+
+@pytest.mark.parametrize(
+    "context,summaries,last",
+    [
+        pytest.param("ctx", ["a ", "", "  ", "b", "done"], "ctx\na\nb", id="padded_and_blank"),
+        pytest.param("  ctx  ", ["  a", "b\n\n", " \n ", "  c ", "done"], "ctx  \n  a\nb\n  c", id="interior_leading_ws_kept"),
+        pytest.param(" ", ["", "  a ", "b", "done"], "a\nb", id="blank_seed"),
+    ],
+)
+def test_rlm_multi_turn_context_matches_baseline_strip(client, context, summaries, last):
+    """Each turn's context equals `(context + "\n" + summary).strip()` applied turn by turn."""
+    contexts = _multi_turn_contexts(client, context, summaries)
+    assert contexts == _baseline_contexts(context, summaries)
+    assert contexts[-1] == last
+
+
+@pytest.mark.parametrize(
+    "env",
+    [
+        pytest.param({"PAGI_MULTI_TURN_CONTEXT_MAX_CHARS": "12"}, id="char_cap"),
+        pytest.param({"PAGI_CONTEXT_SEGMENTS_MAX": "2"}, id="segments_max"),
+        pytest.param({"PAGI_MULTI_TURN_CONTEXT_MAX_CHARS": "5", "PAGI_CONTEXT_SEGMENTS_MAX": "1"}, id="both"),
+    ],
+)
+def test_rlm_multi_turn_capped_context_passed_in_full(client, monkeypatch, env):
+    """Caps bound the loop's working view only; the handler still passes the full accumulated context."""
+    for k, v in env.items():
+        monkeypatch.setenv(k, v)
+    summaries = ["turn one ", "", "  two", "three\n\n", " ", "  four  ", "five", "done"]
+    assert _multi_turn_contexts(client, " seed ", summaries) == _baseline_contexts(" seed ", summaries)
+
+
+def test_rlm_multi_turn_capped_outbound_and_peek_see_full_context(client, monkeypatch, peek_hello):
+    """Under a cap the outbound message carries the full context and an early `file:` is still peeked."""
+    import src.recursive_loop as rl
+
+    messages: list[str] = []
+    peeked: list[str] = []
+    peek_file = rl.peek_file
+
+    def fake_completion(**kwargs):
+        messages.append(kwargs["messages"][-1]["content"])
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content="delegated"))])
+
+    def recording_peek(path, *args, **kwargs):
+        peeked.append(path)
+        return peek_file(path, *args, **kwargs)
+
+    monkeypatch.setattr(rl, "_litellm_completion_fn", fake_completion)
+    monkeypatch.setattr(rl, "_litellm_tried", True)
+    monkeypatch.setattr(rl, "peek_file", recording_peek)
+    monkeypatch.setenv("PAGI_ALLOW_OUTBOUND", "true")
+    monkeypatch.setenv("PAGI_ENFORCE_STRUCTURED", "false")
     monkeypatch.setenv("PAGI_MOCK_MODE", "false")
+    monkeypatch.delenv("PAGI_RLM_STUB_JSON", raising=False)
+    monkeypatch.setenv("PAGI_MULTI_TURN_CONTEXT_MAX_CHARS", "12")
+    monkeypatch.setenv("PAGI_CONTEXT_SEGMENTS_MAX", "1")
 
-    patch_dir = tmp_path / "patches"
-    patch_dir.mkdir(parents=True, exist_ok=True)
-    monkeypatch.setenv(
-        "PAGI_RLM_STUB_JSON",
-        '{"thought":"Proposed fix: add null check and bounds validation.","action":null,"is_final":true}',
-    )
+    seed = f"large_file file:{peek_hello}"
+    r = client.post("/rlm-multi-turn", json={"query": "a complex question", "context": seed, "max_turns": 3})
+    assert r.status_code == 200
+    data = r.json()
+    assert len(data) == 3
+    contexts = _baseline_contexts(seed, [d["summary"] for d in data])
+    assert [json.loads(m)["context"] for m in messages] == contexts
+    assert peeked == [str(peek_hello)] * 3
 
-    r = client.post(
-        "/rlm",
-        json={
-            "query": "Analyze error_trace, self-patch propose Rust fix",
-            "context": "error_trace: panic at main.rs:42",
-            "depth": 0,
-        },
-    )
+
+def test_context_segments_max_bounds_loop_view(monkeypatch):
+    """PAGI_CONTEXT_SEGMENTS_MAX keeps only the last lines in the loop's view: an older "resolved" no longer converges."""
+    import src.recursive_loop as rl
+
+    monkeypatch.setenv("PAGI_MOCK_MODE", "false")
+    monkeypatch.delenv("PAGI_RLM_STUB_JSON", raising=False)
+    query = rl.RLMQuery(query="q", context="resolved\nturn one\nturn two", depth=0)
+    monkeypatch.setenv("PAGI_CONTEXT_SEGMENTS_MAX", "3")
+    assert rl.recursive_loop(query).converged is True
+    monkeypatch.setenv("PAGI_CONTEXT_SEGMENTS_MAX", "2")
+    assert rl.recursive_loop(query).converged is False
+
+
+# (use_case, env, thought, query, context, check, output_glob): the vertical hook runs on the final stub step;
+# output_glob (under PAGI_PROJECT_ROOT=tmp_path) must match at least one written file.
+_VERTICAL_CASES = [
+    # Research: self-patch query with error_trace converges and the summary carries the proposed fix.
+    pytest.param(
+        "research", {},
+        "Proposed fix: add null check and bounds validation.",
+        "Analyze error_trace, self-patch propose Rust fix",
+        "error_trace: panic at main.rs:42",
+        lambda s: "proposed fix" in s.lower() or "Proposed fix" in s,
+        None,
+        id="self_patch",
+    ),
+    # Codegen: is_final triggers write_file_safe to codegen_output; summary contains codegen_output and write observation.
+    pytest.param(
+        "codegen", {"PAGI_CODEGEN_OUTPUT_DIR": "codegen_output"},
+        "def test_analyze_code():\n    assert True",
+        "Generate a test for the analyze_code skill",
+        "",
+        lambda s: "codegen_output" in s and ("Wrote" in s or "bytes" in s),
+        "codegen_output/*.py",
+        id="codegen",
+    ),
+    # Code review: is_final triggers analyze_code → run_tests → write_file_safe to reviewed/.
+    pytest.param(
+        "code_review", {"PAGI_CODE_REVIEW_OUTPUT_DIR": "reviewed"},
+        "Proposed fix: add type hints and docstring.",
+        "Review this code for issues and propose fixes",
+        "code: def add(a, b): return a + b",
+        lambda s: ("reviewed" in s.lower() or "Code review" in s)
+        and ("Wrote" in s or "write" in s.lower() or "bytes" in s),
+        "reviewed/reviewed_*.py",
+        id="code_review",
+    ),
+]
+
+
+@pytest.mark.usefixtures("local_dispatch_env")
+@pytest.mark.parametrize("use_case,env,thought,query,context,check,output_glob", _VERTICAL_CASES)
+def test_rlm_vertical(client, monkeypatch, stub_response, tmp_path, use_case, env, thought, query, context, check, output_glob):
+    """PAGI_VERTICAL_USE_CASE post-processing on convergence, dispatched locally under tmp_path."""
+    monkeypatch.setenv("PAGI_VERTICAL_USE_CASE", use_case)
+    monkeypatch.setenv("PAGI_PROJECT_ROOT", str(tmp_path))
+    for key, value in env.items():
+        monkeypatch.setenv(key, value)
+    stub_response(thought)
+    if use_case == "code_review":
+        # run_tests is part of the review chain; don't spawn a real pytest.
+        result = SimpleNamespace(returncode=0, stdout="1 passed", stderr="")
+        monkeypatch.setattr("subprocess.run", lambda *a, **kw: result)
+
+    r = client.post("/rlm", json={"query": query, "context": context, "depth": 0})
     assert r.status_code == 200
     data = r.json()
     assert data["converged"] is True
-    assert "proposed fix" in data["summary"].lower() or "Proposed fix" in data["summary"]
+    assert check(data["summary"]), data["summary"]
+    if output_glob is not None:
+        assert list(tmp_path.glob(output_glob))
+
+
+def test_output_stamp_unique_within_second(monkeypatch):
+    """Vertical output stamps share the cached second string and differ by sequence suffix."""
+    import src.recursive_loop as rl
+
+    monkeypatch.setattr(rl.time, "time", lambda: 1_700_000_000.5)
+    monkeypatch.setattr(rl, "_ts_sec", -1)
+    a, b = rl._output_stamp(), rl._output_stamp()
+    assert a != b
+    assert a.rsplit("_", 1)[0] == b.rsplit("_", 1)[0]
+    assert (a[-3:], b[-3:]) == ("000", "001")
+
+
+def test_grpc_channel_pool_round_robin(monkeypatch):
+    """PAGI_GRPC_POOL channels are handed out round-robin; PAGI_GRPC_POOL=1 keeps one shared stub."""
+    import src.recursive_loop as rl
+
+    rl._close_grpc_channel()
+    monkeypatch.setenv("PAGI_GRPC_POOL", "2")
+    try:
+        stubs = [rl._get_grpc_stub() for _ in range(4)]
+        assert len(rl._grpc_channels) == 2
+        assert stubs[0] is stubs[2] and stubs[1] is stubs[3] and stubs[0] is not stubs[1]
+
+        rl._close_grpc_channel()
+        monkeypatch.setenv("PAGI_GRPC_POOL", "1")
+        assert rl._get_grpc_stub() is rl._get_grpc_stub()
+    finally:
+        rl._close_grpc_channel()
+
+
+@pytest.mark.skipif(os.environ.get("PAGI_BENCH") != "1", reason="timing gate; set PAGI_BENCH=1")
+def test_local_dispatch_is_faster_than_grpc(rlm_env, monkeypatch, peek_hello):
+    """Local dispatch of peek_file stays well ahead of a loopback gRPC ExecuteAction (guards the in-process path)."""
+    import time
+    from concurrent import futures
+
+    import grpc
+
+    import src.recursive_loop as rl
+    from src.pagi_pb import pagi_pb2, pagi_pb2_grpc
+
+    calls = []
+
+    class _Servicer(pagi_pb2_grpc.PagiServicer):
+        def ExecuteAction(self, request, context):
+            calls.append(request.skill_name)
+            return pagi_pb2.ActionResponse(observation="hello", success=True)
+
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=2))
+    pagi_pb2_grpc.add_PagiServicer_to_server(_Servicer(), server)
+    port = server.add_insecure_port("127.0.0.1:0")
+    server.start()
+    monkeypatch.setattr(
+        rl,
+        "_STUB_MODEL_OVERRIDE",
+        rl.RLMStructuredResponse(
+            thought="peek",
+            action=rl.ActionSpec(skill_name="peek_file", params={"path": peek_hello, "start": 0, "end": 5}),
+        ),
+    )
+    query = rl.RLMQuery(query="bench", context="", depth=0)
+
+    def per_loop_ns(**env) -> float:
+        rl._close_grpc_channel()
+        cfg = rlm_env(PAGI_MOCK_MODE=None, PAGI_VERBOSE_ACTIONS="false", PAGI_GRPC_POOL="1", **env)
+        for _ in range(20):
+            rl.recursive_loop(query, cfg)
+        t0 = time.perf_counter_ns()
+        for _ in range(200):
+            rl.recursive_loop(query, cfg)
+        return (time.perf_counter_ns() - t0) / 200
+
+    try:
+        local = per_loop_ns(PAGI_ACTIONS_VIA_GRPC="false", PAGI_ALLOW_LOCAL_DISPATCH="true")
+        assert not calls
+        remote = per_loop_ns(
+            PAGI_ACTIONS_VIA_GRPC="true", PAGI_ALLOW_LOCAL_DISPATCH="false", PAGI_GRPC_ADDR=f"127.0.0.1:{port}"
+        )
+        assert len(calls) == 220
+    finally:
+        rl._close_grpc_channel()
+        server.stop(None)
+    assert remote >= 5 * local, f"local {local / 1e3:.1f} us vs gRPC {remote / 1e3:.1f} us per loop"
 
 
-def test_rlm_vertical_codegen(monkeypatch, tmp_path):
-    """Vertical codegen: is_final triggers write_file_safe to codegen_output; summary contains codegen_output and write observation."""
-    monkeypatch.setenv("PAGI_VERTICAL_USE_CASE", "codegen")
-    monkeypatch.setenv("PAGI_ACTIONS_VIA_GRPC", "false")
-    monkeypatch.setenv("PAGI_ALLOW_LOCAL_DISPATCH", "true")
-    monkeypatch.setenv("PAGI_PROJECT_ROOT", str(tmp_path))
-    monkeypatch.setenv("PAGI_CODEGEN_OUTPUT_DIR", "codegen_output")
-    monkeypatch.delenv("PAGI_MOCK_MODE", raising=False)
-    monkeypatch.setenv("PAGI_MOCK_MODE", "false")
+def test_actions_log_batches_lines_in_order(monkeypatch, tmp_path):
+    """_log_action lines reach the file in order once the background writer is drained."""
+    import src.recursive_loop as rl
 
-    monkeypatch.setenv(
-        "PAGI_RLM_STUB_JSON",
-        '{"thought":"def test_analyze_code():\\n    assert True","action":null,"is_final":true}',
-    )
+    log = tmp_path / "actions.log"
+    monkeypatch.setenv("PAGI_AGENT_ACTIONS_LOG", str(log))
+    monkeypatch.setenv("PAGI_ACTIONS_LOG_BATCH", "8")
+    try:
+        for i in range(20):
+            rl._log_action(f"ACTION {i}\n")
+    finally:
+        rl._stop_actions_writer()
+    assert log.read_text(encoding="utf-8").splitlines() == [f"ACTION {i}" for i in range(20)]
 
-    r = client.post(
-        "/rlm",
-        json={
-            "query": "Generate a test for the analyze_code skill",
-            "context": "",
-            "depth": 0,
-        },
+
+def test_execute_actions_concurrently_overlaps(monkeypatch):
+    """Independent actions run side by side: both must reach the barrier together; order is preserved."""
+    import threading
+
+    import src.recursive_loop as rl
+
+    barrier = threading.Barrier(2, timeout=5)
+
+    def fake_execute(action, depth, reasoning_id, mock_mode, cfg=None):
+        barrier.wait()
+        return (f"obs:{action.skill_name}", True, "")
+
+    monkeypatch.setattr(rl, "_execute_action", fake_execute)
+    out = rl._execute_actions_concurrently(
+        [rl.ActionSpec(skill_name="analyze_code"), rl.ActionSpec(skill_name="run_tests")], depth=0
     )
-    assert r.status_code == 200
-    data = r.json()
-    assert data["converged"] is True
-    assert "codegen_output" in data["summary"]
-    assert "Wrote" in data["summary"] or "bytes" in data["summary"]
-    # File should exist under tmp_path/codegen_output/
-    codegen_dir = tmp_path / "codegen_output"
-    assert codegen_dir.exists()
-    assert list(codegen_dir.glob("*.py"))
+    assert out == [("obs:analyze_code", True, ""), ("obs:run_tests", True, "")]
 
 
-def test_rlm_vertical_code_review(monkeypatch, tmp_path):
-    """Vertical code_review: is_final triggers analyze_code → run_tests → write_file_safe to reviewed/; summary contains 'reviewed' and write observation."""
-    monkeypatch.setenv("PAGI_VERTICAL_USE_CASE", "code_review")
-    monkeypatch.setenv("PAGI_ACTIONS_VIA_GRPC", "false")
-    monkeypatch.setenv("PAGI_ALLOW_LOCAL_DISPATCH", "true")
-    monkeypatch.setenv("PAGI_PROJECT_ROOT", str(tmp_path))
-    monkeypatch.setenv("PAGI_CODE_REVIEW_OUTPUT_DIR", "reviewed")
-    monkeypatch.delenv("PAGI_MOCK_MODE", raising=False)
+def test_dispatcher_runs_queries_and_counts(monkeypatch):
+    """Dispatcher drains submitted queries through its workers and tracks utilization counters."""
+    import asyncio
+
+    from src.dispatcher import Dispatcher
+    from src.recursive_loop import RLMQuery
+
+    monkeypatch.setenv("PAGI_MOCK_MODE", "true")
+
+    async def main():
+        d = Dispatcher(workers=2, qsize=2)
+        d.start()
+        try:
+            outs = await asyncio.gather(*(d.submit(RLMQuery(query=f"q{i}", depth=0)) for i in range(5)))
+        finally:
+            await d.stop()
+        return outs, d.snapshot()
+
+    outs, stats = asyncio.run(main())
+    assert all(o.converged for o in outs)
+    assert stats["submitted"] == stats["completed"] == 5
+    assert stats["failed"] == 0 and stats["busy"] == 0
+    assert 1 <= stats["max_busy"] <= 2
+
+
+def test_outbound_delegation_uses_cached_litellm_completion(monkeypatch):
+    """Outbound delegation calls the lazily resolved completion callable (no real litellm needed)."""
+    import src.recursive_loop as rl
+
+    calls = []
+
+    def fake_completion(**kwargs):
+        calls.append(kwargs)
+        msg = SimpleNamespace(content="resolved by delegate")
+        return SimpleNamespace(choices=[SimpleNamespace(message=msg)])
+
+    monkeypatch.setattr(rl, "_litellm_completion_fn", fake_completion)
+    monkeypatch.setattr(rl, "_litellm_tried", True)
+    monkeypatch.setenv("PAGI_ALLOW_OUTBOUND", "true")
+    monkeypatch.setenv("PAGI_ENFORCE_STRUCTURED", "false")
     monkeypatch.setenv("PAGI_MOCK_MODE", "false")
+    monkeypatch.delenv("PAGI_RLM_STUB_JSON", raising=False)
 
-    monkeypatch.setenv(
-        "PAGI_RLM_STUB_JSON",
-        '{"thought":"Proposed fix: add type hints and docstring.","action":null,"is_final":true}',
-    )
+    out = rl.recursive_loop(rl.RLMQuery(query="a complex question", context="", depth=0))
+    assert len(calls) == 1
+    assert out.converged is True
 
-    result = MagicMock()
-    result.returncode = 0
-    result.stdout = "1 passed"
-    result.stderr = ""
 
-    with patch("subprocess.run", return_value=result):
-        r = client.post(
-            "/rlm",
-            json={
-                "query": "Review this code for issues and propose fixes",
-                "context": "code: def add(a, b): return a + b",
-                "depth": 0,
-            },
-        )
-    assert r.status_code == 200
-    data = r.json()
-    assert data["converged"] is True
-    assert "reviewed" in data["summary"].lower() or "Code review" in data["summary"]
-    assert "Wrote" in data["summary"] or "write" in data["summary"].lower() or "bytes" in data["summary"]
-    review_dir = tmp_path / "reviewed"
-    assert review_dir.exists()
-    assert list(review_dir.glob("reviewed_*.py"))
+def _self_heal_stub(propose, apply=None):
+    """gRPC stub whose ProposePatch/ApplyPatch return canned responses and record each request by method name."""
+    calls = {"ProposePatch": [], "ApplyPatch": []}
+
+    def method(name, resp):
+        def call(req, **kw):
+            calls[name].append(req)
+            return resp
 
+        return call
 
-def test_self_heal_grpc(monkeypatch):
+    return SimpleNamespace(ProposePatch=method("ProposePatch", propose), ApplyPatch=method("ApplyPatch", apply)), calls
+
+
+def test_self_heal_grpc(client, monkeypatch):
     """When PAGI_ALLOW_SELF_HEAL_GRPC=true and ValidationError occurs, ProposePatch is called via gRPC."""
     monkeypatch.setenv("PAGI_ALLOW_SELF_HEAL_GRPC", "true")
     monkeypatch.setenv("PAGI_RLM_STUB_JSON", "not-json")
     monkeypatch.delenv("PAGI_MOCK_MODE", raising=False)
 
-    mock_stub = MagicMock()
-    mock_stub.ProposePatch.return_value = MagicMock(
-        patch_id="p1", proposed_code="", requires_hitl=True
-    )
+    mock_stub, calls = _self_heal_stub(SimpleNamespace(patch_id="p1", proposed_code="", requires_hitl=True))
 
     with patch("src.recursive_loop._get_grpc_stub", return_value=mock_stub):
         r = client.post(
@@ -668,65 +1120,270 @@ def test_self_heal_grpc(monkeypatch):
     data = r.json()
     assert data["converged"] is False
     assert "schema" in data["summary"].lower() or "enforcement" in data["summary"].lower()
-    mock_stub.ProposePatch.assert_called_once()
-    call_args = mock_stub.ProposePatch.call_args[0][0]
+    assert len(calls["ProposePatch"]) == 1
+    call_args = calls["ProposePatch"][0]
     assert call_args.error_trace
     assert "schema" in call_args.error_trace.lower() or "validation" in call_args.error_trace.lower()
     assert call_args.component == "python_skill"
 
 
-def test_self_heal_grpc_propose(monkeypatch):
+def test_self_heal_grpc_propose(client, monkeypatch):
     """ProposePatch is called with error_trace and component when self-heal gRPC is enabled and error occurs."""
     monkeypatch.setenv("PAGI_ALLOW_SELF_HEAL_GRPC", "true")
     monkeypatch.setenv("PAGI_RLM_STUB_JSON", "not-json")
 
-    mock_stub = MagicMock()
-    mock_stub.ProposePatch.return_value = MagicMock(
-        patch_id="propose-1", proposed_code="# fix", requires_hitl=True
-    )
+    mock_stub, calls = _self_heal_stub(SimpleNamespace(patch_id="propose-1", proposed_code="# fix", requires_hitl=True))
 
     with patch("src.recursive_loop._get_grpc_stub", return_value=mock_stub):
         client.post("/rlm", json={"query": "x", "context": "", "depth": 0})
 
-    mock_stub.ProposePatch.assert_called_once()
-    req = mock_stub.ProposePatch.call_args[0][0]
+    assert len(calls["ProposePatch"]) == 1
+    req = calls["ProposePatch"][0]
     assert req.error_trace
     assert req.component == "python_skill"
 
 
-def test_self_heal_grpc_apply(monkeypatch):
+def test_self_heal_grpc_apply(client, monkeypatch):
     """When propose_resp.requires_hitl=false, ApplyPatch is called with approved=true."""
     monkeypatch.setenv("PAGI_ALLOW_SELF_HEAL_GRPC", "true")
     monkeypatch.setenv("PAGI_RLM_STUB_JSON", "not-json")
 
-    mock_stub = MagicMock()
-    mock_stub.ProposePatch.return_value = MagicMock(
-        patch_id="auto-patch-1", proposed_code="# fix", requires_hitl=False
+    mock_stub, calls = _self_heal_stub(
+        SimpleNamespace(patch_id="auto-patch-1", proposed_code="# fix", requires_hitl=False),
+        SimpleNamespace(success=True, commit_hash="abc123"),
     )
-    mock_stub.ApplyPatch.return_value = MagicMock(success=True, commit_hash="abc123")
 
     with patch("src.recursive_loop._get_grpc_stub", return_value=mock_stub):
         client.post("/rlm", json={"query": "x", "context": "", "depth": 0})
 
-    mock_stub.ProposePatch.assert_called_once()
-    mock_stub.ApplyPatch.assert_called_once()
-    apply_req = mock_stub.ApplyPatch.call_args[0][0]
+    assert len(calls["ProposePatch"]) == 1
+    assert len(calls["ApplyPatch"]) == 1
+    apply_req = calls["ApplyPatch"][0]
     assert apply_req.patch_id == "auto-patch-1"
     assert apply_req.approved is True
     assert apply_req.component == "python_skill"
 
 
-def test_auto_evolve_from_patch():
+def test_self_heal_log_reuses_fd_per_path(monkeypatch, tmp_path):
+    """Self-heal records append through one cached fd, reopened when the log path changes."""
+    import src.recursive_loop as rl
+
+    monkeypatch.delenv("PAGI_ALLOW_SELF_HEAL_GRPC", raising=False)
+    first, second = tmp_path / "heal1.log", tmp_path / "heal2.log"
+    try:
+        monkeypatch.setenv("PAGI_SELF_HEAL_LOG", str(first))
+        rl._report_self_heal("trace-a", "python_skill")
+        fd = rl._self_heal_fd
+        rl._report_self_heal("trace-b", "python_skill")
+        assert rl._self_heal_fd == fd
+        monkeypatch.setenv("PAGI_SELF_HEAL_LOG", str(second))
+        rl._report_self_heal("trace-c", "rust_core")
+    finally:
+        rl._close_self_heal_log()
+
+    assert first.read_text(encoding="utf-8") == (
+        "Self-heal reported\n[python_skill] trace-a\nSelf-heal reported\n[python_skill] trace-b\n"
+    )
+    assert second.read_text(encoding="utf-8") == "Self-heal reported\n[rust_core] trace-c\n"
+
+
+@pytest.mark.parametrize(
+    "patch_text,expected",
+    [
+        ("def fix_it():\n    pass", "fix_it"),
+        ("pub fn heal_me() {}", "heal_me"),
+        ("pub fn first() {}\n\ndef preferred():", "preferred"),
+    ],
+)
+def test_generate_new_skill_name_hint(patch_text, expected):
+    """The name hint prefers a Python def, then a Rust pub fn, regardless of order in the patch."""
+    from src.skills.generate_new_skill import _derive_name_hint
+
+    assert _derive_name_hint(patch_text) == expected
+
+
+def test_auto_evolve_from_patch(monkeypatch, tmp_path):
     """evolve_skill_from_patch skill writes new skill file and returns EVOLVED_PATH for Watchdog commit."""
-    from pathlib import Path
+    import src.skills.evolve_skill_from_patch as evolve
 
-    from src.skills.evolve_skill_from_patch import EvolveSkillFromPatchParams, run
+    # Stand tmp_path in for the bridge root so the stub never lands in the real src/skills.
+    monkeypatch.setattr(evolve, "_BRIDGE_ROOT", tmp_path)
+    monkeypatch.setattr(evolve, "_SKILLS_DIR", tmp_path / "src" / "skills")
 
-    params = EvolveSkillFromPatchParams(patch_content="# fix for null check")
-    out = run(params)
-    assert out.startswith("EVOLVED_PATH:")
+    out = evolve.run(evolve.EvolveSkillFromPatchParams(patch_content="# fix for null check"))
+    assert out.startswith("EVOLVED_PATH:src/skills/evolved_")
     path_str = out.split(":", 1)[1].strip()
-    bridge_root = Path(__file__).resolve().parent.parent
-    full_path = (bridge_root / path_str.replace("\\", "/")).resolve()
+    full_path = tmp_path / path_str
     assert full_path.exists()
-    full_path.unlink()
+    assert "# fix for null check" in full_path.read_text(encoding="utf-8")
+
+
+def test_mock_provider_ws_batched_frame():
+    """Mock /ws/agent: handshake batch=true delivers the whole mock sequence as one JSON-array frame."""
+    import json
+
+    from src.mock_provider import app as mock_app
+
+    mock_client = TestClient(mock_app)
+    with mock_client.websocket_connect("/ws/agent") as ws:
+        ws.send_text(json.dumps({"query": "q", "batch": True}))
+        frame = json.loads(ws.receive_text())
+    assert isinstance(frame, list)
+    assert frame[0]["event"] == "session_started"
+    assert frame[-1]["event"] == "session_ended"
+    assert all("timestamp" in ev for ev in frame)
+
+
+def test_mock_provider_ws_streams_awaited_events():
+    """Mock /ws/agent default (unbatched): every event is actually sent, one AgentEvent object per frame."""
+    import json
+
+    from src.mock_provider import app as mock_app
+
+    mock_client = TestClient(mock_app)
+    with mock_client.websocket_connect("/ws/agent") as ws:
+        ws.send_text(json.dumps({"query": "q", "depth": 1}))
+        events = [json.loads(ws.receive_text()) for _ in range(9)]
+    assert [ev["event"] for ev in events] == [
+        "session_started", "thought", "action_planned", "action_started", "action_completed",
+        "search_issued", "search_result", "converged", "session_ended",
+    ]
+    assert events[0]["depth"] == 1
+    assert events[1]["reasoning_id"] == events[-2]["reasoning_id"]
+
+
+def test_mock_provider_batch_endpoints():
+    """Mock /api/upsert_batch and /api/search_batch return results aligned with the request list."""
+    from src.mock_provider import app as mock_app
+
+    mock_client = TestClient(mock_app)
+    r = mock_client.post(
+        "/api/upsert_batch",
+        json=[
+            {"kb_name": "kb_3", "points": [{"id": "b1", "vector": [0.1], "payload": {"content": "Batch alpha"}}]},
+            {"kb_name": "not_a_kb", "points": [{"id": "x", "vector": [0.1]}]},
+            {"kb_name": "kb_3", "points": [{"id": "b2", "vector": [0.2], "payload": {"content": "batch beta"}}]},
+        ],
+    )
+    assert r.status_code == 200
+    assert r.json() == [
+        {"success": True, "upserted_count": 1},
+        {"success": False, "upserted_count": 0},
+        {"success": True, "upserted_count": 1},
+    ]
+
+    r = mock_client.post(
+        "/api/search_batch",
+        json=[
+            {"query": "batch", "kb_name": "kb_3", "limit": 10},
+            {"query": "beta", "kb_name": "kb_3"},
+            {"query": "batch", "kb_name": "not_a_kb"},
+        ],
+    )
+    assert r.status_code == 200
+    results = r.json()
+    assert [h["document_id"] for h in results[0]["hits"]] == ["b1", "b2"]
+    assert [h["document_id"] for h in results[1]["hits"]] == ["b2"]
+    assert results[2] == {"hits": []}
+
+
+def test_mock_provider_vector_search():
+    """Mock /api/search with query_vector ranks by cosine; ragged or mixed-dimension upserts are still accepted."""
+    from src.mock_provider import app as mock_app
+
+    mock_client = TestClient(mock_app)
+    r = mock_client.post(
+        "/api/upsert",
+        json={
+            "kb_name": "kb_4",
+            "points": [
+                {"id": "east", "vector": [1.0, 0.0], "payload": {"content": "east"}},
+                {"id": "north", "vector": [0.0, 1.0], "payload": {"content": "north"}},
+                {"id": "northeast", "vector": [1.0, 1.0], "payload": {"content": "northeast"}},
+            ],
+        },
+    )
+    assert r.json() == {"success": True, "upserted_count": 3}
+    r = mock_client.post("/api/search", json={"query": "", "kb_name": "kb_4", "limit": 2, "query_vector": [0.9, 0.1]})
+    hits = r.json()["hits"]
+    assert [h["document_id"] for h in hits] == ["east", "northeast"]
+    assert hits[0]["score"] == pytest.approx(0.9 / (0.82 ** 0.5), rel=1e-5)
+
+    # A different dimension, and ragged vectors within one request, are stored as before.
+    r = mock_client.post(
+        "/api/upsert",
+        json={"kb_name": "kb_4", "points": [{"id": "up3", "vector": [0.0, 0.0, 1.0], "payload": {"content": "up"}}]},
+    )
+    assert r.json() == {"success": True, "upserted_count": 1}
+    r = mock_client.post(
+        "/api/upsert",
+        json={"kb_name": "kb_4", "points": [{"id": "r1", "vector": [1.0]}, {"id": "r2", "vector": [0.1, 1.0]}]},
+    )
+    assert r.json() == {"success": True, "upserted_count": 2}
+
+    # Vector search keeps working over the mixed KB, scoring only points of the query's dimension.
+    r = mock_client.post("/api/search", json={"query": "", "kb_name": "kb_4", "limit": 3, "query_vector": [0.9, 0.1]})
+    again = r.json()["hits"]
+    assert [h["document_id"] for h in again] == ["east", "northeast", "r2"]
+    assert again[0]["score"] == pytest.approx(hits[0]["score"], rel=1e-5)
+    r = mock_client.post("/api/search", json={"query": "", "kb_name": "kb_4", "limit": 5, "query_vector": [0.0, 0.0, 2.0]})
+    assert [h["document_id"] for h in r.json()["hits"]] == ["up3"]
+    r = mock_client.post("/api/search", json={"query": "up", "kb_name": "kb_4"})
+    assert [h["document_id"] for h in r.json()["hits"]] == ["up3"]
+
+
+def test_upsert_stream_falls_back_and_surfaces_batch_errors(monkeypatch, tmp_path):
+    """upsert_to_kb is unary by default; stream=True falls back on UNIMPLEMENTED and re-raises batch errors."""
+    import grpc
+    import numpy as np
+
+    import src.embed_and_upsert as eu
+
+    class _Rpc(grpc.RpcError):
+        def __init__(self, code):
+            self._code = code
+
+        def code(self):
+            return self._code
+
+    calls: list[str] = []
+
+    def stream_unimplemented(requests):
+        calls.append("stream")
+        raise _Rpc(grpc.StatusCode.UNIMPLEMENTED)
+
+    def stream_consumes(requests):
+        # Like grpc: an exception from the request iterator surfaces as an opaque UNKNOWN RpcError.
+        calls.append("stream")
+        try:
+            for _ in requests:
+                pass
+        except Exception:
+            raise _Rpc(grpc.StatusCode.UNKNOWN)
+        return SimpleNamespace(success=True, upserted_count=0)
+
+    def unary(req):
+        calls.append("unary")
+        return SimpleNamespace(success=True, upserted_count=len(req.points))
+
+    stub = SimpleNamespace(UpsertVectorsStream=stream_unimplemented, UpsertVectors=unary)
+    model = SimpleNamespace(encode=lambda texts, **kw: np.ones((len(texts), 4), dtype=np.float32))
+    monkeypatch.setattr(eu, "_get_model", lambda name: model)
+    monkeypatch.setattr(eu, "_get_stub", lambda addr: stub)
+    monkeypatch.setenv("PAGI_EMBEDDING_DIM", "4")
+    doc = tmp_path / "doc.md"
+    doc.write_text("x" * 25, encoding="utf-8")
+
+    assert eu.upsert_to_kb("kb_core", doc, chunk_size=10).upserted_count == 3
+    assert calls == ["unary"]
+    calls.clear()
+    assert eu.upsert_to_kb("kb_core", doc, chunk_size=10, stream=True).upserted_count == 3
+    assert calls == ["stream", "unary"]
+
+    def encode_fails(*a, **kw):
+        raise RuntimeError("encode failed")
+
+    stub.UpsertVectorsStream = stream_consumes
+    monkeypatch.setattr(eu, "embed_texts", encode_fails)
+    with pytest.raises(RuntimeError, match="encode failed"):
+        eu.upsert_to_kb("kb_core", doc, chunk_size=10, stream=True)